@@ -7,14 +7,31 @@ current_dir = Path(__file__).parent.parent  # backend folder
 if str(current_dir) not in sys.path:
     sys.path.insert(0, str(current_dir))
 
-from fastapi import APIRouter, HTTPException
-from models.schemas import ChatRequest, ChatResponse
-from gemini_client_final import gemini_client
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from models.schemas import ChatRequest, ChatResponse, ChatBatchRequest, AnalysisRequest
+from llm import llm_client
+from utils.llm_scheduler import classify_priority
+from utils.intent_matcher import match_intents
+from utils.conversation_store import conversation_store
+from llm.summarizer import conversation_summarizer
+from llm.crisis_triage import crisis_triage
+from llm.speculator import quick_reply_speculator
+from llm.document_analysis import document_analyzer
+from llm.cassette import record_turn
+from utils.deadline import deadline_scope, deadline_policy
+from typing import Optional
+from contextlib import aclosing
+import asyncio
+import json
 import time
+import uuid
 from datetime import datetime
 
 router = APIRouter()
 
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "1000"))
+
 @router.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint with REAL Gemini AI - NO TOKEN LIMITS"""
@@ -23,67 +40,402 @@ async def chat_endpoint(request: ChatRequest):
         print(f"💬 Chat request received at {datetime.now().isoformat()}")
         print(f"   Message: '{request.message}'")
         print(f"   User: {request.patient_id or 'anonymous'}")
-        print(f"   Mode: {'REAL Gemini' if not gemini_client.mock_mode else 'MOCK'}")
+        print(f"   Mode: {'REAL Gemini' if not llm_client.mock_mode else 'MOCK'}")
+        record_turn("chat", request.model_dump())
         
-        start_time = time.time()
+        # Crisis messages open with their safety message; the LLM answer follows it
+        triage = crisis_triage.triage(request.message)
+        chat_response = await run_chat_turn(request, triage=triage)
+        
+        print(f"✅ Response generated in {chat_response.metadata['response_time']}")
+        print(f"   AI Model: {chat_response.metadata['ai_model']}")
+        print(f"   Mock Mode: {chat_response.metadata['is_mock']}")
+        print(f"   Response length: {len(chat_response.response)} characters")
+        print(f"   Full response received - not truncated")
+        
+        return chat_response
         
+    except Exception as e:
+        print(f"❌ Chat error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+
+async def run_chat_turn(request: ChatRequest, priority: Optional[str] = None,
+                        triage: Optional[dict] = None) -> ChatResponse:
+    """One chat exchange: LLM response, conversation memory, quick replies and widget
+    
+    With a crisis triage result the response is its safety message followed
+    by the LLM's answer, which is told the patient has seen it.
+    """
+    start_time = time.time()
+    conversation_id = request.conversation_id or new_conversation_id()
+    
+    # A tapped quick reply may already have been answered in the background
+    ai_response = None if triage else quick_reply_speculator.take(conversation_id, request.message)
+    if ai_response is None:
+        context = build_context(request, conversation_id)
+        if triage:
+            quick_reply_speculator.discard(conversation_id)
+            context["safety_message"] = triage["response"]
         # Get REAL AI response (no token limits)
-        ai_response = await gemini_client.generate_response(
+        ai_response = await llm_client.generate_response(
             message=request.message,
-            context={
-                "system_instruction": request.system_instruction or "You are HealthGuard AI, a compassionate healthcare assistant. Provide complete, thorough responses.",
-                "conversation_id": request.conversation_id,
-                "patient_id": request.patient_id,
-                "timestamp": datetime.now().isoformat(),
-                "mode": "real" if not gemini_client.mock_mode else "mock"
-            }
+            context=context,
+            priority=priority or classify_priority(request.message)
         )
+    content = triage["response"] + "\n\n" + ai_response["content"] if triage else ai_response["content"]
+    remember_turn(conversation_id, request.message, content)
+    
+    # Generate quick replies based on content
+    quick_replies = generate_quick_replies(request.message, ai_response["content"])
+    if priority != "batch" and not triage:
+        speculate_quick_replies(request, conversation_id, quick_replies)
+    
+    response_time = time.time() - start_time
+    
+    return ChatResponse(
+        response=content,
+        conversation_id=conversation_id,
+        quick_replies=quick_replies,
+        # Determine widget based on content
+        widget=determine_widget(request.message, ai_response["content"]),
+        metadata={
+            "ai_model": ai_response.get("model_used", "Gemini"),
+            "response_time": f"{response_time:.2f}s",
+            "is_mock": ai_response.get("is_mock", False),
+            "cached": ai_response.get("cached", False),
+            "speculative": ai_response.get("speculative", False),
+            "route": ai_response.get("route"),
+            "triage": triage["category"] if triage else None,
+            "confidence": ai_response.get("confidence", 0.95),
+            "timestamp": datetime.now().isoformat(),
+            "response_length": len(content),
+            "complete_response": True
+        }
+    )
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(batch: ChatBatchRequest):
+    """Run many chat requests concurrently, streaming NDJSON results as each one finishes
+    
+    One line per item ({"index", "status": "ok", "result"} or
+    {"index", "status": "error", "error"}) in completion order, then a
+    {"done": true} summary line. Items run at batch priority, so the
+    shared LLM concurrency limit still favours interactive traffic. Items
+    sharing a conversation_id run one after another, in order.
+    """
+    if len(batch.items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {CHAT_BATCH_MAX_ITEMS} items)")
+    
+    print(f"\n{'='*60}")
+    print(f"📦 Chat batch of {len(batch.items)} items received at {datetime.now().isoformat()}")
+    record_turn("batch", batch.model_dump())
+    
+    # Independent items each get a lane; a conversation's turns share one
+    lanes = {}
+    for index, item in enumerate(batch.items):
+        lane_key = item.conversation_id or f"item:{index}"
+        lanes.setdefault(lane_key, []).append((index, item))
+    
+    async def ndjson_stream():
+        start_time = time.time()
+        results: asyncio.Queue = asyncio.Queue()
         
-        response_time = time.time() - start_time
-        
-        print(f"✅ Response generated in {response_time:.2f}s")
-        print(f"   AI Model: {ai_response.get('model_used', 'Unknown')}")
-        print(f"   Mock Mode: {ai_response.get('is_mock', True)}")
-        print(f"   Response length: {len(ai_response['content'])} characters")
-        print(f"   Full response received - not truncated")
+        async def run_lane(items):
+            for index, item in items:
+                try:
+                    # The batch has no deadline as a whole; each item gets a chat request's
+                    with deadline_scope(deadline_policy.seconds_for("/api/chat")):
+                        chat_response = await run_chat_turn(item, priority="batch")
+                    await results.put({"index": index, "status": "ok", "result": chat_response.model_dump()})
+                except Exception as e:
+                    print(f"❌ Batch item {index} failed: {e!r}")
+                    await results.put({"index": index, "status": "error", "error": str(e) or repr(e)})
         
-        # Generate quick replies based on content
-        quick_replies = generate_quick_replies(request.message, ai_response["content"])
+        tasks = [asyncio.create_task(run_lane(items)) for items in lanes.values()]
+        succeeded = failed = 0
+        try:
+            for _ in range(len(batch.items)):
+                line = await results.get()
+                if line["status"] == "ok":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away - don't keep spending quota on its batch
+            for task in tasks:
+                task.cancel()
         
-        # Determine widget based on content
-        widget = determine_widget(request.message, ai_response["content"])
+        elapsed = time.time() - start_time
+        print(f"✅ Batch finished in {elapsed:.2f}s ({succeeded} ok, {failed} failed)")
+        yield json.dumps({
+            "done": True,
+            "total": len(batch.items),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed": f"{elapsed:.2f}s"
+        }) + "\n"
+    
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+@router.post("/analyze")
+async def analyze_endpoint(request: AnalysisRequest):
+    """Analyze a lab report, prescription or other medical document
+    
+    Long documents are analyzed in chunks and merged (see
+    llm/document_analysis.py). Returns symptoms, possible_conditions,
+    urgency, recommendations, red_flags and a summary.
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="No text to analyze")
+    print(f"\n🔬 Analysis request received ({len(request.text)} chars)")
+    result = await document_analyzer.analyze(request.text)
+    if result is None:
+        raise HTTPException(status_code=503, detail="Analysis unavailable - please try again")
+    print(f"✅ Analysis finished in {result['processing_time']} ({result['chunks']} chunks)")
+    return result
+
+@router.post("/analyze/stream")
+async def analyze_stream_endpoint(request: AnalysisRequest):
+    """Analyze a medical document, with progress as Server-Sent Events
+    
+    Events: `chunks` (how many chunks the document was split into),
+    `chunk` as each chunk's analysis finishes (with its urgency and red
+    flags, and whether it came from cache), `reduce` when the findings are
+    being merged, then `done` carrying the analysis. `error` replaces
+    `done` if the analysis fails.
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="No text to analyze")
+    print(f"\n🔬 Streaming analysis request received ({len(request.text)} chars)")
+    
+    async def event_stream():
+        try:
+            async with aclosing(document_analyzer.analyze_stream(request.text)) as events:
+                async for event, data in events:
+                    yield sse_event(event, data)
+        except Exception as e:
+            print(f"❌ Analysis error: {e!r}")
+            yield sse_event("error", {"error": str(e) or repr(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming chat endpoint - tokens as Server-Sent Events as Gemini produces them
+    
+    Events: `start` (conversation id), `safety` (crisis messages only - the
+    safety message, sent before the LLM answers), `token` (text delta), then
+    a `done` trailer carrying quick replies, widget and metadata. `error`
+    replaces `done` if the stream fails part way.
+    """
+    conversation_id = request.conversation_id or new_conversation_id()
+    
+    print(f"\n{'='*60}")
+    print(f"🌊 Streaming chat request received at {datetime.now().isoformat()}")
+    print(f"   Message: '{request.message}'")
+    print(f"   User: {request.patient_id or 'anonymous'}")
+    record_turn("stream", request.model_dump())
+    
+    async def event_stream():
+        # Flush something immediately so the client sees the connection open
+        yield sse_event("start", {"conversation_id": conversation_id})
         
-        return ChatResponse(
-            response=ai_response["content"],
-            conversation_id=request.conversation_id or f"conv_{int(time.time())}",
-            quick_replies=quick_replies,
-            widget=widget,
-            metadata={
-                "ai_model": ai_response.get("model_used", "Gemini"),
-                "response_time": f"{response_time:.2f}s",
-                "is_mock": ai_response.get("is_mock", False),
-                "confidence": ai_response.get("confidence", 0.95),
-                "timestamp": datetime.now().isoformat(),
-                "response_length": len(ai_response["content"]),
-                "complete_response": True
-            }
+        async with aclosing(stream_chat_turn(request, conversation_id)) as events:
+            async for event, data in events:
+                yield sse_event(event, data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Persistent chat session - one socket per conversation
+    
+    Query parameters (conversation_id, patient_id, system_instruction) bind
+    the session once. Each client frame is {"message": "..."} or plain
+    text; the answer streams back over the same socket as the SSE events,
+    framed as {"type": "start" | "safety" | "token" | "done" | "error", ...}.
+    {"type": "ping"} is answered with {"type": "pong"}.
+    """
+    await websocket.accept()
+    params = websocket.query_params
+    session = ChatRequest(
+        message="",
+        conversation_id=params.get("conversation_id") or new_conversation_id(),
+        patient_id=params.get("patient_id"),
+        system_instruction=params.get("system_instruction")
+    )
+    print(f"🔌 Chat WebSocket opened for {session.conversation_id} ({session.patient_id or 'anonymous'})")
+    
+    try:
+        await websocket.send_json({
+            "type": "session",
+            "conversation_id": session.conversation_id,
+            "patient_id": session.patient_id
+        })
+        while True:
+            frame = parse_ws_frame(await websocket.receive_text())
+            if frame.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            message = str(frame.get("message") or "").strip()
+            if not message:
+                await websocket.send_json({"type": "error", "detail": "Empty message"})
+                continue
+            
+            # Session fields were validated once at connect; only the message changes per turn
+            request = session.model_copy(update={"message": message})
+            record_turn("ws", request.model_dump())
+            await websocket.send_json({"type": "start", "conversation_id": session.conversation_id})
+            # Each turn gets the deadline of a streamed chat request
+            with deadline_scope(deadline_policy.seconds_for("/api/chat/stream")):
+                async with aclosing(stream_chat_turn(request, session.conversation_id)) as events:
+                    async for event, data in events:
+                        await websocket.send_json({"type": event, **data})
+    except WebSocketDisconnect:
+        print(f"🔌 Chat WebSocket closed for {session.conversation_id}")
+    except Exception as e:
+        print(f"❌ Chat WebSocket error: {e}")
+
+def parse_ws_frame(raw: str) -> dict:
+    """A client frame as a dict - JSON objects as-is, anything else is the message text"""
+    try:
+        frame = json.loads(raw)
+    except ValueError:
+        return {"message": raw}
+    return frame if isinstance(frame, dict) else {"message": raw}
+
+async def stream_chat_turn(request: ChatRequest, conversation_id: str):
+    """Yield (event, data) for one streamed exchange: `token`s, then `done` (or `error`)
+    
+    A crisis message first gets a `safety` event with its safety message;
+    the tokens that follow are the LLM's elaboration of it.
+    """
+    start_time = time.time()
+    first_token_time = None
+    parts = []
+    last_chunk = {}
+    context = build_context(request, conversation_id)
+    
+    triage = crisis_triage.triage(request.message)
+    if triage:
+        context["safety_message"] = triage["response"]
+        yield "safety", {"text": triage["response"], "triage": triage["category"], "version": triage["version"]}
+    
+    # A tapped quick reply that was answered in the background goes out in one token
+    speculative = quick_reply_speculator.take(conversation_id, request.message)
+    if speculative:
+        chunks = replay_response(speculative)
+    else:
+        chunks = llm_client.stream_response(
+            message=request.message,
+            context=context,
+            priority=classify_priority(request.message)
         )
-        
+    
+    try:
+        async for chunk in chunks:
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+            parts.append(chunk["text"])
+            last_chunk = chunk
+            yield "token", {"text": chunk["text"]}
     except Exception as e:
-        print(f"❌ Chat error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+        print(f"❌ Chat stream error: {str(e)}")
+        yield "error", {"detail": f"Chat error: {str(e)}"}
+        return
+    
+    full_response = "".join(parts)
+    response_time = time.time() - start_time
+    remember_turn(
+        conversation_id, request.message,
+        triage["response"] + "\n\n" + full_response if triage else full_response
+    )
+    print(f"✅ Stream finished in {response_time:.2f}s (first token {first_token_time or 0:.2f}s)")
+    
+    quick_replies = generate_quick_replies(request.message, full_response)
+    if not triage:
+        speculate_quick_replies(request, conversation_id, quick_replies)
+    
+    yield "done", {
+        "conversation_id": conversation_id,
+        "quick_replies": quick_replies,
+        "widget": determine_widget(request.message, full_response),
+        "metadata": {
+            "ai_model": last_chunk.get("model_used", "Gemini"),
+            "response_time": f"{response_time:.2f}s",
+            "time_to_first_token": f"{first_token_time or 0:.2f}s",
+            "is_mock": last_chunk.get("is_mock", False),
+            "cached": last_chunk.get("cached", False),
+            "speculative": last_chunk.get("speculative", False),
+            "route": last_chunk.get("route"),
+            "triage": triage["category"] if triage else None,
+            "timestamp": datetime.now().isoformat(),
+            "response_length": len(full_response),
+            "complete_response": True
+        }
+    }
+
+def new_conversation_id() -> str:
+    """Unique id for a conversation the client did not name (its history is stored under it)"""
+    return f"conv_{uuid.uuid4().hex[:16]}"
+
+def build_context(request: ChatRequest, conversation_id: str, speculative: bool = False):
+    """Context dict passed to the LLM client for a chat request, with the conversation's earlier turns and summary
+
+    speculative contexts (quick reply drafts) are left out of the summarizer's savings counters.
+    """
+    return {
+        "system_instruction": request.system_instruction or "You are HealthGuard AI, a compassionate healthcare assistant. Provide complete, thorough responses.",
+        "conversation_id": conversation_id,
+        **conversation_summarizer.prompt_context(conversation_id, count=not speculative),
+        "patient_id": request.patient_id,
+        "timestamp": datetime.now().isoformat(),
+        "mode": "real" if not llm_client.mock_mode else "mock"
+    }
+
+def remember_turn(conversation_id: str, message: str, response: str):
+    """Store the exchange so the next turn of this conversation sees it
+
+    Older turns are summarized in the background once the conversation grows.
+    """
+    conversation_store.append(conversation_id, "user", message)
+    conversation_store.append(conversation_id, "assistant", response)
+    conversation_summarizer.maybe_schedule(conversation_id)
+
+async def replay_response(ai_response: dict):
+    """A finished response as a one-chunk stream"""
+    yield {"text": ai_response["content"], **ai_response}
+
+def speculate_quick_replies(request: ChatRequest, conversation_id: str, quick_replies: list):
+    """Answer the quick replies just offered in the background, if SPECULATIVE_REPLIES is on"""
+    if quick_reply_speculator.enabled:
+        quick_reply_speculator.speculate(
+            conversation_id, quick_replies, build_context(request, conversation_id, speculative=True)
+        )
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 def generate_quick_replies(user_message: str, ai_response: str):
     """Generate context-aware quick replies"""
-    message_lower = user_message.lower()
-    response_lower = ai_response.lower()
+    intents = match_intents(user_message)
     
     replies = []
     
     # Mental health quick replies
-    if any(word in message_lower for word in ['panic', 'anxiety', 'attack', 'scared', 'afraid', 'stress']):
+    if "reply.mental_health" in intents:
         replies = [
             "Grounding Exercises",
             "Breathing Techniques", 
@@ -91,28 +443,28 @@ def generate_quick_replies(user_message: str, ai_response: str):
             "Emergency Help"
         ]
     # Medical-related quick replies
-    elif any(word in message_lower for word in ['sick', 'ill', 'unwell', 'pain', 'hurt', 'fever']):
+    elif "reply.medical" in intents:
         replies = [
             "Schedule Appointment",
             "Symptom Checker", 
             "Medication Info",
             "Find Urgent Care"
         ]
-    elif 'appointment' in message_lower:
+    elif "reply.appointment" in intents:
         replies = [
             "Check Availability",
             "Reschedule",
             "Cancel Appointment",
             "Telehealth Options"
         ]
-    elif any(word in message_lower for word in ['prescription', 'medication', 'pill']):
+    elif "reply.medication" in intents:
         replies = [
             "Refill Request",
             "Side Effects",
             "Dosage Info",
             "Alternative Meds"
         ]
-    elif any(word in message_lower for word in ['result', 'test', 'lab', 'blood']):
+    elif "reply.results" in intents:
         replies = [
             "View Lab Results",
             "Explain Results",
@@ -130,40 +482,40 @@ def generate_quick_replies(user_message: str, ai_response: str):
         ]
     
     # Add emergency option if urgent keywords detected
-    if any(word in response_lower for word in ['emergency', 'urgent', '911', 'immediate', 'severe', 'panic']):
+    if "reply.urgent" in match_intents(ai_response):
         replies = ["🚨 Emergency Help"] + replies[:3]
     
     return replies[:4]
 
 def determine_widget(user_message: str, ai_response: str):
     """Determine which widget to show based on conversation"""
-    message_lower = user_message.lower()
-    response_lower = ai_response.lower()
+    intents = match_intents(user_message)
     
     # Mental health widget
-    if any(word in message_lower for word in ['panic', 'anxiety', 'stress', 'mental']):
+    if "widget.mental_health" in intents:
         return "mental_health"
     
-    if 'appointment' in message_lower or 'schedule' in message_lower:
+    if "widget.calendar" in intents:
         return "calendar"
     
-    if any(word in message_lower for word in ['symptom', 'check', 'assessment']):
+    if "widget.symptom_checker" in intents:
         return "symptom_checker"
     
-    if any(word in message_lower for word in ['medication', 'prescription', 'pharmacy']):
+    if "widget.medication_list" in intents:
         return "medication_list"
     
-    if any(word in message_lower for word in ['result', 'test', 'lab']):
+    if "widget.lab_results" in intents:
         return "lab_results"
     
-    if any(word in message_lower for word in ['bill', 'payment', 'insurance']):
+    if "widget.billing" in intents:
         return "billing"
     
     # Check if AI suggested a widget
-    if 'calendar' in response_lower or 'schedule' in response_lower:
+    response_intents = match_intents(ai_response)
+    if "widget.suggests_calendar" in response_intents:
         return "calendar"
     
-    if 'symptom' in response_lower or 'assessment' in response_lower:
+    if "widget.suggests_symptom_checker" in response_intents:
         return "symptom_checker"
     
     return None
\ No newline at end of file
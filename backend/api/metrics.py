@@ -12,6 +12,26 @@ import random
 from datetime import datetime, timedelta
 import psutil
 
+from utils.http_transport import gemini_transport
+from utils.response_cache import response_cache, analysis_cache
+from utils.single_flight import gemini_single_flight
+from utils.llm_scheduler import llm_scheduler
+from utils.adaptive_limit import concurrency_controller
+from utils.circuit_breaker import circuit_breakers
+from utils.hedging import hedge_policy
+from utils.conversation_store import conversation_store
+from utils.intent_matcher import intent_matcher
+from llm import llm_client, llm_instrumentation
+from llm.instrumentation import llm_call_metrics
+from llm.summarizer import conversation_summarizer
+from llm.crisis_triage import crisis_triage
+from llm.speculator import quick_reply_speculator
+from llm.router import model_router
+from llm.context_cache import gemini_context_cache
+from llm.document_analysis import document_analyzer
+from utils.deadline import deadline_policy
+from utils.key_pool import gemini_key_pool
+
 router = APIRouter()
 
 # Mock data for activities
@@ -24,6 +44,18 @@ mock_activities = [
     {"id": "act6", "type": "webhook", "user": "Retell.ai", "time": "25 min ago", "status": "processed", "details": "Voice transcript analyzed"}
 ]
 
+def ai_live_metrics():
+    """Last hour of LLM traffic, from the client's per-call accounting"""
+    last_hour = llm_call_metrics.recent(3600)
+    return {
+        "tokens_processed": last_hour["tokens"],
+        "response_time_ms": round(last_hour["mean_latency_ms"]),
+        "p95_response_time_ms": round(llm_call_metrics.latency_ms.quantile(0.95)),
+        "active_sessions": conversation_store.get_stats()["conversations"],
+        "model": llm_client.backend.display_name,
+        "requests_last_hour": last_hour["calls"]
+    }
+
 @router.get("/live")
 async def get_live_metrics():
     """Get real-time system metrics"""
@@ -47,13 +79,7 @@ async def get_live_metrics():
                 "bytes_recv_mb": round(net_io.bytes_recv / (1024**2), 2),
                 "active_connections": random.randint(5, 20)
             },
-            "ai": {
-                "tokens_processed": random.randint(1000, 5000),
-                "response_time_ms": random.randint(100, 500),
-                "active_sessions": random.randint(3, 15),
-                "model": "Gemini 1.5 Flash",
-                "requests_last_hour": random.randint(50, 200)
-            },
+            "ai": ai_live_metrics(),
             "automation": {
                 "workflows_active": 3,
                 "webhooks_processed": random.randint(50, 200),
@@ -62,7 +88,7 @@ async def get_live_metrics():
             },
             "services": [
                 {"name": "API Gateway", "status": "up", "latency_ms": random.randint(10, 50)},
-                {"name": "AI Engine", "status": "up", "latency_ms": random.randint(100, 300)},
+                {"name": "AI Engine", "status": "up", "latency_ms": round(llm_call_metrics.latency_ms.quantile(0.5))},
                 {"name": "CRM Sync", "status": "up", "latency_ms": random.randint(200, 500)},
                 {"name": "Voice Relay", "status": "up", "latency_ms": random.randint(50, 150)},
                 {"name": "Database", "status": "up", "latency_ms": random.randint(20, 80)}
@@ -79,11 +105,7 @@ async def get_live_metrics():
                 "active_connections": 12,
                 "requests_per_second": 45
             },
-            "ai": {
-                "tokens_processed": 1240,
-                "response_time_ms": 142,
-                "active_sessions": 8
-            },
+            "ai": ai_live_metrics(),
             "automation": {
                 "workflows_active": 3,
                 "webhooks_processed": 89,
@@ -106,21 +128,44 @@ async def get_recent_activities():
 
 @router.get("/throughput")
 async def get_throughput():
-    """Get system throughput data"""
-    # Generate time series data for charts
-    timestamps = []
-    values = []
-    
-    now = datetime.now()
-    for i in range(24):
-        time = (now - timedelta(hours=i)).strftime("%H:00")
-        timestamps.append(time)
-        values.append(random.randint(800, 2000))
+    """Get system throughput data: LLM calls per hour over the last 24 hours"""
+    hours = llm_call_metrics.hourly(24)
+    timestamps = [datetime.fromtimestamp(hour["hour"]).strftime("%H:00") for hour in hours]
+    values = [hour["calls"] for hour in hours]
     
     return {
-        "timestamps": list(reversed(timestamps)),
-        "values": list(reversed(values)),
+        "timestamps": timestamps,
+        "values": values,
+        "tokens": [hour["tokens"] for hour in hours],
         "average": round(sum(values) / len(values), 1),
         "peak": max(values),
         "current": values[-1]
     }
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """Get LLM client internals (calls, backend, pool, cache, coalescing, scheduler, limits, breakers, hedging, memory)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "backend": llm_client.get_status(),
+        "calls": llm_call_metrics.get_stats(),
+        "backends": llm_instrumentation.get_stats(),
+        "transport": gemini_transport.get_stats(),
+        "cache": response_cache.get_stats(),
+        "analysis_cache": analysis_cache.get_stats(),
+        "document_analysis": document_analyzer.get_stats(),
+        "coalescing": gemini_single_flight.get_stats(),
+        "scheduler": llm_scheduler.get_stats(),
+        "concurrency": concurrency_controller.get_stats(),
+        "circuit_breakers": circuit_breakers.get_stats(),
+        "hedging": hedge_policy.get_stats(),
+        "conversations": conversation_store.get_stats(),
+        "summarization": conversation_summarizer.get_stats(),
+        "intents": intent_matcher.get_stats(),
+        "crisis_triage": crisis_triage.get_stats(),
+        "speculation": quick_reply_speculator.get_stats(),
+        "routing": model_router.get_stats(),
+        "deadlines": deadline_policy.get_stats(),
+        "api_keys": gemini_key_pool.get_stats(),
+        "context_cache": gemini_context_cache.get_stats()
+    }
@@ -7,6 +7,8 @@ import re
 from datetime import datetime
 from dotenv import load_dotenv
 
+from utils.intent_matcher import match_intents
+
 load_dotenv()
 
 router = APIRouter()
@@ -73,12 +75,12 @@ def process_for_free_account(transcript: str, call_id: str, metadata: Dict[str,
     processed_transcript = process_template_variables(transcript, metadata or {})
     print(f"📝 Processed transcript: {processed_transcript}")
     
-    transcript_lower = processed_transcript.lower()
+    intents = match_intents(processed_transcript)
     response = ""
     actions = []
     
     # Healthcare-specific rule-based responses
-    if any(word in transcript_lower for word in ['medication', 'prescription', 'refill', 'pill', 'drug']):
+    if "voice.medication" in intents:
         response = """I can help you with your medication. Let me check your prescription records.
 
 💊 **Current Medications:**
@@ -95,7 +97,7 @@ def process_for_free_account(transcript: str, call_id: str, metadata: Dict[str,
 Would you like me to process a refill for any of these medications?"""
         actions = ["check_prescription", "verify_patient", "process_refill"]
         
-    elif any(word in transcript_lower for word in ['appointment', 'schedule', 'book', 'meeting']):
+    elif "voice.appointment" in intents:
         response = """I can help you schedule an appointment.
 
 📅 **Available Times:**
@@ -111,7 +113,7 @@ Would you like me to process a refill for any of these medications?"""
 What day and time works best for you?"""
         actions = ["schedule_appointment", "update_calendar", "send_confirmation"]
         
-    elif any(word in transcript_lower for word in ['symptom', 'pain', 'hurt', 'fever', 'cough', 'headache']):
+    elif "voice.symptoms" in intents:
         response = """I understand you're experiencing symptoms. Let me help assess them.
 
 🔍 **Please provide more details:**
@@ -127,7 +129,7 @@ What day and time works best for you?"""
 • Sudden severe headache"""
         actions = ["triage_symptoms", "schedule_urgent_care", "recommend_otc"]
         
-    elif any(word in transcript_lower for word in ['test', 'lab', 'result', 'blood', 'xray']):
+    elif "voice.results" in intents:
         response = """I can help you with test results.
 
 🧪 **Recent Lab Results:**
@@ -142,7 +144,7 @@ Would you like to:
 3. Discuss results with a provider"""
         actions = ["retrieve_results", "schedule_test", "notify_provider"]
         
-    elif any(word in transcript_lower for word in ['bill', 'payment', 'insurance', 'claim']):
+    elif "voice.billing" in intents:
         response = """I can assist with billing and insurance questions.
 
 💰 **Current Balance: $245.00**
@@ -157,7 +159,7 @@ Options:
 • Dispute a charge"""
         actions = ["check_balance", "process_payment", "submit_claim"]
         
-    elif any(word in transcript_lower for word in ['hello', 'hi', 'hey', 'greetings']):
+    elif "voice.greeting" in intents:
         response = """Hello! 👋 This is HealthGuard AI, your virtual healthcare assistant.
 
 I can help you with:
@@ -171,7 +173,7 @@ I can help you with:
 What can I assist you with today?"""
         actions = ["greeting"]
         
-    elif any(word in transcript_lower for word in ['thank', 'thanks', 'appreciate']):
+    elif "voice.thanks" in intents:
         response = "You're welcome! 😊 Is there anything else I can help you with regarding your healthcare needs?"
         actions = ["acknowledge_gratitude"]
         
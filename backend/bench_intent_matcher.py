@@ -0,0 +1,119 @@
+"""Microbenchmark: compiled intent matcher vs the old per-call-site keyword chains
+
+    python bench_intent_matcher.py [--repeat 5]
+
+For each transcript size it times the old approach (every call site
+lowercases the text again and runs its own `any(word in text ...)` chains)
+against one IntentMatcher.scan(), checks both find the same intents, and
+prints per-call latency and throughput.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from utils.intent_matcher import INTENT_KEYWORDS, intent_matcher
+
+
+def intents_with_prefix(prefix: str):
+    return [name for name in INTENT_KEYWORDS if name.startswith(prefix)]
+
+
+# The old code lowercased the text once per call site
+CALL_SITES = {
+    "classify_priority": ["crisis"],
+    "crisis_triage": intents_with_prefix("crisis."),
+    "is_patient_specific": ["personal"],
+    "route_model": intents_with_prefix("route."),
+    "generate_quick_replies": intents_with_prefix("reply."),
+    "determine_widget": intents_with_prefix("widget."),
+    "get_mock_response": intents_with_prefix("mock."),
+    "process_for_free_account": intents_with_prefix("voice."),
+}
+
+# A new intent family needs its call site above, or the "same" column lies
+_uncovered = set(INTENT_KEYWORDS) - {intent for intents in CALL_SITES.values() for intent in intents}
+assert not _uncovered, f"Intents missing from CALL_SITES: {', '.join(sorted(_uncovered))}"
+
+SENTENCES = [
+    "Hi, I'm calling because I've had a headache since Tuesday and it gets worse at night.",
+    "My daughter has a fever of about 101 and a dry cough, should we come in today?",
+    "I need a refill on my blood pressure medication before the weekend.",
+    "Can you tell me whether my lab results from last week are back yet?",
+    "I'd like to book a follow-up appointment with Dr. Smith sometime next month.",
+    "The insurance claim for my x-ray was denied and I don't understand the bill.",
+    "I've been feeling really anxious and stressed at work, it's affecting my sleep.",
+    "Thanks so much, I appreciate you helping me with this today.",
+    "The pharmacy said the prescription wasn't sent over, can someone check on it?",
+    "Honestly I'm not sure what's going on, I just feel tired and a bit off lately.",
+]
+
+
+def legacy_scan(text: str):
+    """What the old code did: a fresh lower() and keyword chain per call site"""
+    found = set()
+    for intents in CALL_SITES.values():
+        text_lower = text.lower()
+        for intent in intents:
+            if any(word in text_lower for word in INTENT_KEYWORDS[intent]):
+                found.add(intent)
+    return frozenset(found)
+
+
+def make_transcript(chars: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:chars]
+
+
+def time_per_call(func, text: str, repeat: int) -> float:
+    calls = max(3, 2_000_000 // max(len(text), 1))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(text)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent matcher microbenchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", default="80,400,4000,40000,400000")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    stats = intent_matcher.get_stats()
+    print(f"\n🔎 {stats['intents']} intents, {stats['keywords']} distinct keywords, "
+          f"{sum(len(k) for k in INTENT_KEYWORDS.values())} keyword checks per message before\n")
+    print(f"{'chars':>8} | {'old chains':>12} | {'matcher':>12} | {'speedup':>7} | {'matcher MB/s':>12} | same")
+    print("-" * 72)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        text = make_transcript(size, rng)
+        same = legacy_scan(text) == intent_matcher.scan(text)
+        legacy = time_per_call(legacy_scan, text, args.repeat)
+        matcher = time_per_call(intent_matcher.scan, text, args.repeat)
+        throughput = len(text.encode("utf-8")) / matcher / 1e6
+        print(f"{size:>8} | {legacy * 1e6:>10.1f}us | {matcher * 1e6:>10.1f}us | "
+              f"{legacy / matcher:>6.1f}x | {throughput:>12.1f} | {'✅' if same else '❌'}")
+
+    # Repeated lookups of one message within a request hit the memo
+    message = SENTENCES[1]
+    intent_matcher.match(message)
+    cached = time_per_call(intent_matcher.match, message, args.repeat)
+    print(f"\n⚡ Memoized repeat lookup of a chat message: {cached * 1e9:.0f}ns\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Replay benchmark: recorded chat traffic through the whole app, no network
+
+    LLM_CASSETTE_RECORD=llm_cassette.jsonl.gz uvicorn main:app   # record real traffic first
+    python bench_replay.py llm_cassette.jsonl.gz [--speed 1] [--latency-scale 1] [--stream]
+
+Sends every recorded inbound chat turn - the request body as the client
+sent it, conversation_id included - to the endpoint it arrived on, at its
+recorded arrival time divided by --speed. Turns that came in over the
+WebSocket go to /api/chat/stream, which runs the same turn code. Only the
+LLM calls are answered from the cassette, at their recorded latency times
+--latency-scale; cache hits, rules-routed and triaged turns and coalesced
+duplicates happen (or not) in the app as they would live, so a change to
+routing, caches, scheduler, breaker or hedging can be compared on the
+same traffic. Prints latency percentiles, throughput, how each answer was
+produced and how well the cassette matched.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# Where each recorded endpoint's turns are sent
+ENDPOINT_PATHS = {
+    "chat": "/api/chat",
+    "stream": "/api/chat/stream",
+    "ws": "/api/chat/stream",
+    "batch": "/api/chat/batch",
+}
+
+
+async def send(client, path: str, body: dict):
+    """(status, seconds) for one recorded turn; streams count until the `done` event, batches until their summary"""
+    start = time.perf_counter()
+    if path == "/api/chat":
+        response = await client.post(path, json=body)
+        return response.status_code, time.perf_counter() - start
+    status = None
+    async with client.stream("POST", path, json=body) as response:
+        status = response.status_code
+        async for line in response.aiter_lines():
+            if line.startswith("event: error"):
+                status = 502
+            if line.startswith("event: done") or line.startswith("event: error") or line.startswith('{"done"'):
+                break
+    return status, time.perf_counter() - start
+
+
+async def run(args, turns):
+    import httpx
+    from main import app
+    from llm import llm_client
+    from llm.instrumentation import llm_call_metrics
+
+    limit = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            first = turns[0]["t"]
+            start = time.perf_counter()
+
+            async def fire(entry):
+                delay = (entry["t"] - first) / args.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                path = ENDPOINT_PATHS[entry["endpoint"]]
+                if args.stream and path == "/api/chat":
+                    path = "/api/chat/stream"
+                async with limit:
+                    results.append(await send(client, path, entry["request"]))
+
+            await asyncio.gather(*(fire(entry) for entry in turns))
+            elapsed = time.perf_counter() - start
+        cassette = llm_client.backend.get_status().get("cassette", {})
+
+    latencies = [seconds * 1000 for _, seconds in results]
+    ok = sum(1 for status, _ in results if status == 200)
+    endpoints = {}
+    for entry in turns:
+        endpoints[entry["endpoint"]] = endpoints.get(entry["endpoint"], 0) + 1
+    print(f"\n📼 {len(results)} chat turns ({json.dumps(endpoints)}) in {elapsed:.1f}s ({len(results) / elapsed:.1f}/s), {ok} OK")
+    print(f"   latency p50 {percentile(latencies, 50):.0f}ms | p95 {percentile(latencies, 95):.0f}ms | "
+          f"p99 {percentile(latencies, 99):.0f}ms | max {max(latencies):.0f}ms")
+    print(f"   outcomes: {json.dumps(llm_call_metrics.outcomes)}")
+    print(f"   cassette: {cassette.get('exact_hits', 0)} exact, {cassette.get('message_hits', 0)} by message, "
+          f"{cassette.get('misses', 0)} misses\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded chat traffic through the app")
+    parser.add_argument("cassette")
+    parser.add_argument("--speed", type=float, default=1.0, help="Arrival rate multiplier")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Recorded LLM latency multiplier (0 = instant)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Most turns in flight at once")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N turns")
+    parser.add_argument("--stream", action="store_true", help="Send /api/chat turns to /api/chat/stream")
+    args = parser.parse_args()
+
+    # The backend reads these when main is imported
+    os.environ["LLM_BACKEND"] = "replay"
+    os.environ["LLM_CASSETTE"] = args.cassette
+    os.environ["LLM_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+    os.environ["MOCK_MODE"] = "false"
+    os.environ.pop("LLM_CASSETTE_RECORD", None)
+
+    from llm.cassette import load_cassette
+    turns = sorted((entry for entry in load_cassette(args.cassette) if entry.get("op") == "turn"),
+                   key=lambda entry: entry["t"])
+    if args.limit:
+        turns = turns[:args.limit]
+    if not turns:
+        sys.exit(f"No chat turns recorded in {args.cassette} (cassettes before version 2 only hold LLM calls)")
+    asyncio.run(run(args, turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+"""Local Gemini stand-in server for load tests
+
+Speaks the generateContent / streamGenerateContent request and response
+shapes the REST backend uses, with configurable latency distribution,
+token rate, error/429 injection and response size, so /api/chat can be
+load-tested without spending quota:
+
+    python gemini_standin.py --port 8090 --latency-ms 600 --tokens-per-sec 60
+    GEMINI_BASE_URL=http://127.0.0.1:8090 GEMINI_API_KEY=standin uvicorn main:app
+
+Knobs can be changed while it runs (POST /standin/config {"throttle_rate": 0.2})
+and GET /standin/stats reports what it served. cachedContents can be
+created, refreshed and deleted like on Gemini; cached prompt tokens skip
+the simulated prefill time.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import deque, defaultdict
+from typing import Dict, Any, Optional
+
+# Add the current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+from utils.canned_answers import simulated_answer, wants_json, payload_text, estimate_tokens
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class StandInConfig:
+    """Behaviour knobs, read from STANDIN_* environment variables"""
+
+    def __init__(self):
+        self.model = os.getenv("STANDIN_MODEL", "gemini-2.5-flash")
+        # Time to first token
+        self.latency_distribution = os.getenv("STANDIN_LATENCY_DISTRIBUTION", "lognormal")
+        self.latency_ms = float(os.getenv("STANDIN_LATENCY_MS", "600"))
+        self.jitter_ms = float(os.getenv("STANDIN_JITTER_MS", "150"))
+        self.lognormal_sigma = float(os.getenv("STANDIN_LOGNORMAL_SIGMA", "0.4"))
+        # Occasional slow outliers, as seen from the real API
+        self.slow_rate = float(os.getenv("STANDIN_SLOW_RATE", "0"))
+        self.slow_factor = float(os.getenv("STANDIN_SLOW_FACTOR", "5"))
+        # Generation speed and size
+        self.tokens_per_sec = float(os.getenv("STANDIN_TOKENS_PER_SEC", "80"))
+        self.chunk_tokens = int(os.getenv("STANDIN_CHUNK_TOKENS", "8"))
+        # "" keeps the canned answer's length, "300" is fixed, "200-800" is uniform
+        self.response_tokens = os.getenv("STANDIN_RESPONSE_TOKENS", "")
+        # Failure injection
+        self.error_rate = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+        self.throttle_rate = float(os.getenv("STANDIN_THROTTLE_RATE", "0"))
+        # Answer 429 above this many concurrent requests (0 = unlimited)
+        self.max_concurrency = int(os.getenv("STANDIN_MAX_CONCURRENCY", "0"))
+        # Answer 429 (with a retryDelay, like Gemini) once one API key sends more than this per minute (0 = unlimited)
+        self.key_rpm = int(os.getenv("STANDIN_KEY_RPM", "0"))
+        # Time spent reading prompt tokens that are not in a context cache (0 = free)
+        self.prefill_tokens_per_sec = float(os.getenv("STANDIN_PREFILL_TOKENS_PER_SEC", "20000"))
+        # Smallest cachedContents Gemini accepts
+        self.cache_min_tokens = int(os.getenv("STANDIN_CACHE_MIN_TOKENS", "1024"))
+
+    def update(self, changes: Dict[str, Any]):
+        for key, value in changes.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Unknown setting '{key}'")
+            current = getattr(self, key)
+            setattr(self, key, type(current)(value))
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+config = StandInConfig()
+stats = {
+    "requests": 0,
+    "streams": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "ok": 0,
+    "throttled": 0,
+    "errors": 0,
+    "prompt_tokens": 0,
+    "output_tokens": 0,
+    "cached_tokens": 0,
+    "caches_created": 0,
+}
+# name -> {"model", "key", "tokens", "expires"} for cachedContents
+cached_contents: Dict[str, Dict[str, Any]] = {}
+# Request times per API key in the last minute, for key_rpm
+key_requests = defaultdict(deque)
+key_counts = defaultdict(int)
+
+app = FastAPI(title="Gemini Stand-in", docs_url=None, redoc_url=None)
+
+
+def sample_latency() -> float:
+    """Seconds until the first token, drawn from the configured distribution"""
+    mean = config.latency_ms
+    distribution = config.latency_distribution
+    if distribution == "uniform":
+        latency = random.uniform(mean - config.jitter_ms, mean + config.jitter_ms)
+    elif distribution == "normal":
+        latency = random.gauss(mean, config.jitter_ms)
+    elif distribution == "lognormal":
+        latency = random.lognormvariate(math.log(max(mean, 1.0)), config.lognormal_sigma)
+    elif distribution == "exponential":
+        latency = random.expovariate(1 / mean) if mean > 0 else 0.0
+    else:
+        latency = mean
+    if config.slow_rate and random.random() < config.slow_rate:
+        latency *= config.slow_factor
+    return max(0.0, latency) / 1000
+
+
+def target_tokens(max_output_tokens: Optional[int]) -> Optional[int]:
+    spec = config.response_tokens.strip()
+    if not spec:
+        tokens = None
+    elif "-" in spec:
+        low, high = spec.split("-", 1)
+        tokens = random.randint(int(low), int(high))
+    else:
+        tokens = int(spec)
+    if max_output_tokens:
+        tokens = min(tokens, max_output_tokens) if tokens else None
+    return tokens
+
+
+def build_answer(payload: Dict[str, Any]):
+    """Canned answer for the patient's message, resized to the configured token count
+
+    Returns (text, finish_reason).
+    """
+    generation_config = payload.get("generationConfig") or {}
+    max_output_tokens = generation_config.get("maxOutputTokens")
+    text = simulated_answer(payload)
+    # Padding or cutting JSON would break it
+    if wants_json(payload):
+        return text, "STOP"
+
+    tokens = target_tokens(max_output_tokens)
+    if tokens is None and max_output_tokens and estimate_tokens(text) > max_output_tokens:
+        tokens = max_output_tokens
+    if tokens is None:
+        return text, "STOP"
+
+    # ~4 characters per token, matching estimate_tokens
+    target_chars = tokens * 4
+    while len(text) < target_chars:
+        text = f"{text}\n\n{text}"
+    finish_reason = "MAX_TOKENS" if max_output_tokens and tokens >= max_output_tokens else "STOP"
+    return text[:target_chars], finish_reason
+
+
+def chunk_body(text: str, model: str, finish_reason: Optional[str] = None,
+               usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    body = {"candidates": [candidate], "modelVersion": model}
+    if usage:
+        body["usageMetadata"] = usage
+    return body
+
+
+def usage_metadata(prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Dict[str, int]:
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return usage
+
+
+def api_error(code: int, status: str, message: str, details: Optional[list] = None) -> JSONResponse:
+    error = {"code": code, "message": message, "status": status}
+    if details:
+        error["details"] = details
+    return JSONResponse(status_code=code, content={"error": error})
+
+
+def key_quota_exceeded(key: str) -> Optional[JSONResponse]:
+    """429 once this key has used its per-minute request quota"""
+    key_counts[key] += 1
+    if not config.key_rpm:
+        return None
+    now = time.monotonic()
+    window = key_requests[key]
+    while window and now - window[0] >= 60:
+        window.popleft()
+    if len(window) >= config.key_rpm:
+        retry_delay = math.ceil(window[0] + 60 - now)
+        return api_error(429, "RESOURCE_EXHAUSTED", "Quota exceeded for metric: generate_content_requests per minute.", [
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{retry_delay}s"}
+        ])
+    window.append(now)
+    return None
+
+
+def injected_failure(key: str) -> Optional[JSONResponse]:
+    """429/5xx according to the injection settings, or None to serve normally"""
+    quota_error = key_quota_exceeded(key)
+    if quota_error is not None:
+        return quota_error
+    if config.max_concurrency and stats["in_flight"] > config.max_concurrency:
+        return api_error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+    if config.throttle_rate and random.random() < config.throttle_rate:
+        return api_error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+    if config.error_rate and random.random() < config.error_rate:
+        if random.random() < 0.5:
+            return api_error(503, "UNAVAILABLE", "The model is overloaded. Please try again later.")
+        return api_error(500, "INTERNAL", "An internal error has occurred.")
+    return None
+
+
+@app.get("/{version}/models")
+async def list_models(version: str):
+    return {"models": [await get_model(version, config.model)]}
+
+
+@app.get("/{version}/models/{model}")
+async def get_model(version: str, model: str):
+    return {
+        "name": f"models/{model}",
+        "displayName": f"{model} (stand-in)",
+        "supportedGenerationMethods": ["generateContent", "streamGenerateContent"],
+    }
+
+
+@app.post("/{version}/models/{model_action}")
+async def model_action(version: str, model_action: str, request: Request):
+    model, _, action = model_action.partition(":")
+    if action not in ("generateContent", "streamGenerateContent"):
+        return api_error(404, "NOT_FOUND", f"Method '{action}' is not supported by the stand-in")
+    if not request.query_params.get("key"):
+        return api_error(400, "INVALID_ARGUMENT", "API key not valid. Please pass a valid API key.")
+
+    payload = await request.json()
+    cached_tokens = 0
+    if payload.get("cachedContent"):
+        if payload.get("systemInstruction"):
+            return api_error(400, "INVALID_ARGUMENT",
+                             "CachedContent can not be used with GenerateContent request setting system_instruction.")
+        cache = live_cache(payload["cachedContent"], request.query_params["key"])
+        if cache is None:
+            return api_error(403, "PERMISSION_DENIED", "CachedContent not found (or permission denied)")
+        if cache["model"] != model:
+            return api_error(400, "INVALID_ARGUMENT", f"Model {model} does not match the model of the cached content")
+        cached_tokens = cache["tokens"]
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    released = False
+    try:
+        failure = injected_failure(request.query_params["key"])
+        if failure is not None:
+            # Rejections are fast, like the real quota check
+            await asyncio.sleep(random.uniform(0.005, 0.02))
+            stats["throttled" if failure.status_code == 429 else "errors"] += 1
+            return failure
+
+        text, finish_reason = build_answer(payload)
+        prompt_tokens = estimate_tokens(payload_text(payload))
+        output_tokens = estimate_tokens(text)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["output_tokens"] += output_tokens
+        stats["cached_tokens"] += cached_tokens
+        usage = usage_metadata(prompt_tokens + cached_tokens, output_tokens, cached_tokens)
+        prefill = prompt_tokens / config.prefill_tokens_per_sec if config.prefill_tokens_per_sec else 0.0
+
+        if action == "generateContent":
+            await asyncio.sleep(prefill + sample_latency() + output_tokens / config.tokens_per_sec)
+            stats["ok"] += 1
+            return chunk_body(text, model, finish_reason, usage)
+
+        stats["streams"] += 1
+        sse = request.query_params.get("alt") == "sse"
+        released = True
+        return StreamingResponse(
+            stream_chunks(text, model, finish_reason, usage, sse, prefill),
+            media_type="text/event-stream" if sse else "application/json"
+        )
+    finally:
+        if not released:
+            stats["in_flight"] -= 1
+
+
+async def stream_chunks(text: str, model: str, finish_reason: str, usage: Dict[str, int], sse: bool,
+                        prefill: float = 0.0):
+    """Pace the answer out at tokens_per_sec; SSE with alt=sse, else a streamed JSON array"""
+    try:
+        await asyncio.sleep(prefill + sample_latency())
+        chunk_chars = max(1, config.chunk_tokens) * 4
+        pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        if not sse:
+            yield "["
+        for index, piece in enumerate(pieces):
+            if index:
+                await asyncio.sleep(estimate_tokens(piece) / config.tokens_per_sec)
+            last = index == len(pieces) - 1
+            body = json.dumps(chunk_body(piece, model, finish_reason if last else None, usage if last else None))
+            if sse:
+                yield f"data: {body}\r\n\r\n"
+            else:
+                yield ("," if index else "") + body
+        if not sse:
+            yield "]"
+        stats["ok"] += 1
+    finally:
+        stats["in_flight"] -= 1
+
+
+def live_cache(name: str, key: str) -> Optional[Dict[str, Any]]:
+    """A cachedContents entry usable with this key (caches belong to the key's project)"""
+    cache = cached_contents.get(name)
+    if cache is None or cache["key"] != key:
+        return None
+    if cache["expires"] <= time.time():
+        del cached_contents[name]
+        return None
+    return cache
+
+
+def parse_ttl(ttl: str) -> float:
+    """"600s" -> 600.0"""
+    return float(str(ttl).rstrip("s"))
+
+
+def cache_resource(name: str, cache: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "model": f"models/{cache['model']}",
+        "expireTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(cache["expires"])),
+        "usageMetadata": {"totalTokenCount": cache["tokens"]},
+    }
+
+
+@app.post("/{version}/cachedContents")
+async def create_cached_content(version: str, request: Request):
+    key = request.query_params.get("key")
+    if not key:
+        return api_error(400, "INVALID_ARGUMENT", "API key not valid. Please pass a valid API key.")
+    body = await request.json()
+    tokens = estimate_tokens(payload_text(body))
+    if tokens < config.cache_min_tokens:
+        return api_error(400, "INVALID_ARGUMENT",
+                         f"Cached content is too small. total_token_count={tokens}, min_total_token_count={config.cache_min_tokens}")
+    name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+    cached_contents[name] = {
+        "model": body.get("model", "").removeprefix("models/"),
+        "key": key,
+        "tokens": tokens,
+        "expires": time.time() + parse_ttl(body.get("ttl", "3600s")),
+    }
+    stats["caches_created"] += 1
+    return cache_resource(name, cached_contents[name])
+
+
+@app.get("/{version}/cachedContents/{cache_id}")
+async def get_cached_content(version: str, cache_id: str, request: Request):
+    name = f"cachedContents/{cache_id}"
+    cache = live_cache(name, request.query_params.get("key"))
+    if cache is None:
+        return api_error(403, "PERMISSION_DENIED", "CachedContent not found (or permission denied)")
+    return cache_resource(name, cache)
+
+
+@app.patch("/{version}/cachedContents/{cache_id}")
+async def update_cached_content(version: str, cache_id: str, request: Request):
+    name = f"cachedContents/{cache_id}"
+    cache = live_cache(name, request.query_params.get("key"))
+    if cache is None:
+        return api_error(403, "PERMISSION_DENIED", "CachedContent not found (or permission denied)")
+    body = await request.json()
+    if "ttl" in body:
+        cache["expires"] = time.time() + parse_ttl(body["ttl"])
+    return cache_resource(name, cache)
+
+
+@app.delete("/{version}/cachedContents/{cache_id}")
+async def delete_cached_content(version: str, cache_id: str, request: Request):
+    name = f"cachedContents/{cache_id}"
+    if live_cache(name, request.query_params.get("key")) is None:
+        return api_error(403, "PERMISSION_DENIED", "CachedContent not found (or permission denied)")
+    del cached_contents[name]
+    return {}
+
+
+@app.get("/standin/config")
+async def get_config():
+    return config.as_dict()
+
+
+@app.post("/standin/config")
+async def update_config(request: Request):
+    try:
+        config.update(await request.json())
+    except (ValueError, TypeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    print(f"🎛️  Stand-in config updated: {config.as_dict()}")
+    return config.as_dict()
+
+
+@app.get("/standin/stats")
+async def get_stats():
+    # Keys are reported by their last 4 characters only
+    return {**stats, "cached_contents": len(cached_contents), "requests_per_key": {f"…{key[-4:]}": count for key, count in key_counts.items()}, "config": config.as_dict()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STANDIN_PORT", "8090")))
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--tokens-per-sec", type=float)
+    parser.add_argument("--response-tokens", help='"300" or a range like "200-800"')
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--throttle-rate", type=float)
+    parser.add_argument("--max-concurrency", type=int)
+    parser.add_argument("--key-rpm", type=int, help="per-API-key requests per minute before 429")
+    args = parser.parse_args()
+
+    config.update({
+        key: value for key, value in vars(args).items()
+        if key not in ("host", "port") and value is not None
+    })
+
+    print("\n" + "="*60)
+    print("🧪 Gemini stand-in")
+    print(f"🔗 http://{args.host}:{args.port}  (set GEMINI_BASE_URL to this)")
+    print(f"🎛️  {config.as_dict()}")
+    print("="*60 + "\n")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# LLM backends package
+from llm.base import LLMBackend, BackendError, BackendTimeout, KeyPoolExhausted
+from llm.registry import register_backend, create_backend, available_backends
+from llm.client import LLMClient
+from llm.instrumentation import llm_instrumentation
+
+# Global client for the backend selected by LLM_BACKEND (instant - call warm_up() to connect)
+llm_client = LLMClient(create_backend())
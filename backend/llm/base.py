@@ -0,0 +1,111 @@
+from typing import Dict, Any, Optional, AsyncIterator
+
+
+class BackendError(Exception):
+    """An LLM backend call failed
+
+    status_code is the upstream HTTP status when there was one (429, 500, ...),
+    or None for transport-level failures.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def kind(self) -> str:
+        if self.status_code is None:
+            return "transport"
+        if self.status_code == 429:
+            return "throttled"
+        if self.status_code >= 500:
+            return "server_error"
+        return "client_error"
+
+    @property
+    def upstream_unhealthy(self) -> bool:
+        """Throttling, server errors and transport failures count against the circuit breaker"""
+        return self.kind != "client_error"
+
+
+class BackendTimeout(BackendError):
+    """The backend did not answer in time"""
+
+    @property
+    def kind(self) -> str:
+        return "timeout"
+
+
+class KeyPoolExhausted(BackendError):
+    """No API key had quota left for the request, so it was never sent
+
+    Says nothing about the upstream's health: kept out of the concurrency
+    controller and the circuit breaker.
+    """
+
+    @property
+    def kind(self) -> str:
+        return "key_pool_exhausted"
+
+    @property
+    def upstream_unhealthy(self) -> bool:
+        return False
+
+
+class LLMBackend:
+    """Interface every LLM backend implements
+
+    Backends take a Gemini generateContent request body and return
+    {"text", "prompt_tokens", "output_tokens"}; token counts may be None
+    when the backend cannot report them. model overrides the backend's own
+    model for one call; backends that cannot switch models ignore it. Scheduling, caching, circuit
+    breaking and instrumentation live in LLMClient, so every backend is
+    measured the same way.
+    """
+
+    name = "base"
+    # False for backends that only ever return canned answers
+    is_real = True
+
+    def __init__(self):
+        self.ready = False
+        self.model_name: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def display_name(self) -> str:
+        return self.model_name or self.name
+
+    def model_display_name(self, model: Optional[str] = None) -> str:
+        """Display name for a per-call model override (this backend's own when None)"""
+        return self.display_name
+
+    @property
+    def source_name(self) -> str:
+        """Name responses cite as their source"""
+        return self.display_name
+
+    async def warm_up(self):
+        """Finish any slow initialization; called in the background at startup"""
+        self.ready = True
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                     model: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield {"text": delta} chunks; the default streams the whole answer as one chunk"""
+        yield await self.generate(payload, timeout=timeout, model=model)
+
+    async def aclose(self):
+        pass
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "backend": self.name,
+            "mode": "real" if self.is_real else "mock",
+            "model": self.model_name,
+            "error": self.last_error,
+        }
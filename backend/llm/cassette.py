@@ -0,0 +1,280 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, AsyncIterator, List
+
+from llm.base import LLMBackend, BackendError, BackendTimeout
+from utils.canned_answers import chat_message
+
+# Cassettes are gzipped JSON lines: a header line per recording session,
+# then one line per inbound chat turn and one per backend call:
+#   {"t": unix time, "op": "turn", "endpoint": "chat"|"stream"|"ws"|"batch",
+#    "request": the ChatRequest body ({"items": [...]} for a batch)}
+#   {"t": unix time, "op": "generate"|"stream", "model": override or null,
+#    "key": request hash, "message": patient message (chat calls only),
+#    "ms": latency, "text": answer, "pt"/"ot": prompt/output tokens,
+#    "chunks": [[ms since start, text], ...] (streams),
+#    "error": {"kind", "status", "message"} (failed calls)}
+# Turns are what the app was asked; calls are what it asked the LLM for them.
+# A turn answered from cache, by the rules route or by triage has no call.
+CASSETTE_VERSION = 2
+
+# The recorder LLM_CASSETTE_RECORD set up, if any
+active_recorder: Optional["CassetteRecorder"] = None
+
+
+def request_key(payload: Dict[str, Any], model: Optional[str]) -> str:
+    """Stable hash of a request body and model override"""
+    raw = json.dumps([payload, model], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    """Recorded turns and calls in recording order (session headers skipped)"""
+    entries = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "cassette" not in entry:
+                entries.append(entry)
+    return entries
+
+
+def record_turn(endpoint: str, request: Dict[str, Any]):
+    """Log an inbound chat turn to the cassette being recorded (no-op when not recording)"""
+    if active_recorder is not None:
+        active_recorder.record_turn(endpoint, request)
+
+
+def raise_recorded_error(error: Dict[str, Any]):
+    if error.get("kind") == "timeout":
+        raise BackendTimeout(error.get("message", "Recorded timeout"))
+    raise BackendError(error.get("message", "Recorded error"), error.get("status"))
+
+
+class CassetteRecorder:
+    """Wraps a backend and saves every call it makes - request hash, answer, tokens, timings - to a cassette
+
+    The chat endpoints add each inbound turn through record_turn, so the
+    cassette holds the traffic itself as well as the calls that reached
+    the LLM. Only the patient's message is kept from a call's prompt, never
+    the full request body, so cassettes stay small and hold no more patient
+    data than the chat traffic itself. Everything but generate/stream is
+    the wrapped backend's.
+    """
+
+    def __init__(self, backend: LLMBackend, path: str, flush_every: int = 20):
+        self.backend = backend
+        self.path = path
+        self.flush_every = flush_every
+        self._pending: List[Dict[str, Any]] = [{
+            "cassette": CASSETTE_VERSION,
+            "backend": backend.name,
+            "model": backend.model_name,
+            "recorded_at": datetime.now().isoformat(),
+        }]
+        self.recorded = 0
+        self.turns = 0
+        global active_recorder
+        active_recorder = self
+        print(f"📼 Recording chat turns and LLM calls to {path}")
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            **self.backend.get_status(),
+            "cassette": {"mode": "record", "path": self.path, "turns": self.turns, "recorded": self.recorded},
+        }
+
+    def record_turn(self, endpoint: str, request: Dict[str, Any]):
+        self.turns += 1
+        self._pending.append({"t": round(time.time(), 3), "op": "turn", "endpoint": endpoint, "request": request})
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def _entry(self, op: str, payload: Dict[str, Any], model: Optional[str]) -> Dict[str, Any]:
+        return {
+            "t": round(time.time(), 3),
+            "op": op,
+            "model": model,
+            "key": request_key(payload, model),
+            "message": chat_message(payload),
+        }
+
+    def _save(self, entry: Dict[str, Any]):
+        self._pending.append(entry)
+        self.recorded += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append buffered calls to the cassette (each flush adds a gzip member)"""
+        if not self._pending:
+            return
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            for entry in self._pending:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._pending = []
+
+    @staticmethod
+    def _error(e: BackendError) -> Dict[str, Any]:
+        return {"kind": e.kind, "status": e.status_code, "message": str(e)[:200]}
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        entry = self._entry("generate", payload, model)
+        start = time.perf_counter()
+        try:
+            result = await self.backend.generate(payload, timeout=timeout, model=model)
+        except BackendError as e:
+            self._save({**entry, "ms": round((time.perf_counter() - start) * 1000, 1), "error": self._error(e)})
+            raise
+        self._save({
+            **entry,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "text": result["text"],
+            "pt": result.get("prompt_tokens"),
+            "ot": result.get("output_tokens"),
+        })
+        return result
+
+    async def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                     model: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        entry = self._entry("stream", payload, model)
+        start = time.perf_counter()
+        chunks = []
+        usage = {}
+        error = None
+        completed = False
+        try:
+            async for chunk in self.backend.stream(payload, timeout=timeout, model=model):
+                if chunk.get("text"):
+                    chunks.append([round((time.perf_counter() - start) * 1000, 1), chunk["text"]])
+                if chunk.get("output_tokens") is not None:
+                    usage = chunk
+                yield chunk
+            completed = True
+        except BackendError as e:
+            error = self._error(e)
+            raise
+        finally:
+            # A stream the caller abandoned is not a complete recording
+            if completed or error is not None:
+                self._save({
+                    **entry,
+                    "ms": round((time.perf_counter() - start) * 1000, 1),
+                    "text": "".join(text for _, text in chunks),
+                    "pt": usage.get("prompt_tokens"),
+                    "ot": usage.get("output_tokens"),
+                    "chunks": chunks,
+                    **({"error": error} if error else {}),
+                })
+
+    async def aclose(self):
+        self.flush()
+        await self.backend.aclose()
+
+
+class CassetteReplayBackend(LLMBackend):
+    """Serves recorded calls back from a cassette, with no network
+
+    A request is matched on its exact body first, then on the patient's
+    message (prompts carry timestamps and change as prompt building is
+    worked on, so exact matches are rare for chat). Calls recorded more
+    than once are served in turn. Latency is the recorded one scaled by
+    LLM_CASSETTE_LATENCY_SCALE (0 = instant); streams keep their chunk
+    timing. Recorded errors are replayed as errors; requests with no
+    recording fail with a 404 BackendError (a client error, so they never
+    trip the circuit breaker) and are counted as misses.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: Optional[str] = None, latency_scale: Optional[float] = None):
+        super().__init__()
+        self.path = path or os.getenv("LLM_CASSETTE", "llm_cassette.jsonl.gz")
+        self.latency_scale = latency_scale if latency_scale is not None else float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+        self.entries = [entry for entry in load_cassette(self.path) if entry.get("op") != "turn"]
+        self._by_key: Dict[str, deque] = {}
+        self._by_message: Dict[str, deque] = {}
+        for entry in self.entries:
+            self._by_key.setdefault(entry["key"], deque()).append(entry)
+            if entry.get("message") is not None:
+                self._by_message.setdefault(entry["message"], deque()).append(entry)
+        self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.stats = {
+            "exact_hits": 0,
+            "message_hits": 0,
+            "misses": 0,
+        }
+        self.ready = True
+        print(f"📼 Replaying {len(self.entries)} recorded LLM calls from {self.path} (latency x{self.latency_scale})")
+
+    def model_display_name(self, model: Optional[str] = None) -> str:
+        return " ".join(word.capitalize() for word in (model or self.model_name).split("-"))
+
+    @property
+    def display_name(self) -> str:
+        return self.model_display_name()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            **super().get_status(),
+            "cassette": {"mode": "replay", "path": self.path, "calls": len(self.entries),
+                         "latency_scale": self.latency_scale, **self.stats},
+        }
+
+    def _take(self, queue: Optional[deque]) -> Optional[Dict[str, Any]]:
+        if not queue:
+            return None
+        entry = queue[0]
+        queue.rotate(-1)
+        return entry
+
+    def _lookup(self, payload: Dict[str, Any], model: Optional[str]) -> Dict[str, Any]:
+        entry = self._take(self._by_key.get(request_key(payload, model)))
+        if entry is not None:
+            self.stats["exact_hits"] += 1
+            return entry
+        message = chat_message(payload)
+        entry = self._take(self._by_message.get(message)) if message is not None else None
+        if entry is not None:
+            self.stats["message_hits"] += 1
+            return entry
+        self.stats["misses"] += 1
+        raise BackendError("No cassette recording for this request", 404)
+
+    async def _sleep(self, ms: float):
+        if self.latency_scale > 0 and ms > 0:
+            await asyncio.sleep(ms * self.latency_scale / 1000)
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        entry = self._lookup(payload, model)
+        await self._sleep(entry["ms"])
+        if entry.get("error"):
+            raise_recorded_error(entry["error"])
+        return {"text": entry["text"], "prompt_tokens": entry.get("pt"), "output_tokens": entry.get("ot")}
+
+    async def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                     model: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        entry = self._lookup(payload, model)
+        # Recorded with generate: one chunk once the whole answer would have arrived
+        chunks = entry.get("chunks") or [[entry["ms"], entry.get("text", "")]]
+        elapsed = 0.0
+        for offset, text in chunks:
+            await self._sleep(offset - elapsed)
+            elapsed = offset
+            if text:
+                yield {"text": text}
+        if entry.get("error"):
+            await self._sleep(entry["ms"] - elapsed)
+            raise_recorded_error(entry["error"])
+        yield {"text": "", "prompt_tokens": entry.get("pt"), "output_tokens": entry.get("ot")}
@@ -0,0 +1,531 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+from contextlib import aclosing
+from typing import Dict, Any, Optional, List
+
+from llm.base import LLMBackend, BackendError
+from llm.prompts import (
+    build_chat_payload, build_analysis_payload, build_merge_payload, build_summary_payload,
+    get_mock_analysis, get_mock_summary, get_rule_response,
+    ANALYSIS_SCHEMA, ANALYSIS_SCHEMA_VERSION
+)
+from utils.canned_answers import get_mock_response
+from llm.structured import parse_structured
+from llm.instrumentation import llm_instrumentation, llm_call_metrics, CallRecord
+from llm.router import model_router, RouteProfile
+from utils.response_cache import response_cache, analysis_cache, is_patient_specific
+from utils.single_flight import gemini_single_flight
+from utils.llm_scheduler import llm_scheduler
+from utils.adaptive_limit import concurrency_controller
+from utils.circuit_breaker import circuit_breakers
+from utils import deadline
+
+
+class LLMClient:
+    """The one entry point for chat and analysis, whatever backend is configured
+
+    Caching, coalescing, circuit breaking, hedging, scheduling and
+    instrumentation wrap every backend the same way; backends only turn a
+    request body into text. Chat messages are routed first (see
+    llm/router.py): small talk never reaches the backend, and the rest go
+    out with their route's model and budgets.
+    """
+
+    def __init__(self, backend: LLMBackend):
+        self.backend = backend
+        print(f"🤖 LLM client using '{backend.name}' backend ({backend.display_name})")
+
+    @property
+    def mock_mode(self) -> bool:
+        return not self.backend.is_real
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return self.backend.model_name
+
+    async def warm_up(self):
+        await self.backend.warm_up()
+
+    @property
+    def ready(self) -> bool:
+        return self.backend.ready
+
+    def get_status(self) -> Dict[str, Any]:
+        return self.backend.get_status()
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+    def _result(self, text: str, profile: RouteProfile) -> Dict[str, Any]:
+        return {
+            "content": text,
+            "sources": [self.backend.source_name],
+            "confidence": 0.95,
+            "model_used": self.backend.model_display_name(profile.model),
+            "route": profile.name,
+            "is_mock": not self.backend.is_real
+        }
+
+    def _rule_response(self, message: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        response = get_rule_response(model_router.trivial_kind(message))
+        model_router.instrumentation.record("rules", (time.perf_counter() - start) * 1000, 0, 0)
+        return {**response, "route": "rules"}
+
+    def _cache_key(self, message: str, context: Dict[str, Any], profile: RouteProfile):
+        """Response cache key, or None when the bypass rules say go upstream"""
+        if response_cache.should_bypass(message, context):
+            response_cache.record_bypass()
+            return None
+        return response_cache.make_key(
+            message, (context or {}).get("system_instruction"), profile.model or self.model_name
+        )
+
+    def _breaker(self, operation: str, profile: RouteProfile):
+        return circuit_breakers.get(f"{self.backend.name}:{profile.model or self.model_name}:{operation}")
+
+    def _latency_series(self, profile: RouteProfile, streaming: bool) -> str:
+        """Concurrency controller series: streams report time to first chunk, generate calls the whole answer"""
+        return f"{profile.model or self.model_name}/{'first_chunk' if streaming else 'total'}"
+
+    @staticmethod
+    def _count_deadline_fallback(result: Optional[Dict[str, Any]]):
+        """Count a fallback (None or a mock answer) the request's deadline forced"""
+        if (result is None or result.get("is_mock")) and deadline.expired():
+            deadline.deadline_policy.record_fallback("llm")
+
+    def _outcome(self, result: Dict[str, Any]) -> str:
+        """How a call was answered, for llm_call_metrics"""
+        if result.get("route") == "rules":
+            return "rules"
+        if result.get("cached"):
+            return "cached"
+        if result.get("coalesced"):
+            return "coalesced"
+        if result.get("is_mock"):
+            return "mock" if self.mock_mode else "fallback"
+        return "real"
+
+    async def generate_response(self, message: str, context: Dict[str, Any] = None, priority: str = "chat"):
+        """Generate a chat response (served from the response cache when possible)
+
+        priority is the scheduler class ("crisis", "chat", "batch" or "speculative")
+        used when this call has to wait for an upstream slot.
+        """
+        record = llm_call_metrics.start("chat")
+        result = await self._generate_response(message, context, priority, record)
+        llm_call_metrics.finish(record, self._outcome(result), result.get("model_used"), result.get("route"))
+        return result
+
+    async def _generate_response(self, message: str, context: Dict[str, Any], priority: str, record: CallRecord):
+        if self.mock_mode:
+            return get_mock_response(message)
+
+        route = model_router.route(message, context)
+        if route == "rules":
+            return self._rule_response(message)
+        profile = model_router.profile(route)
+
+        cache_key = self._cache_key(message, context, profile)
+        if cache_key:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ Response cache hit")
+                return {**cached, "cached": True}
+
+        # Identical prompts already in flight share one upstream call
+        if is_patient_specific(message, context):
+            ai_response = await self._generate_uncached(message, context, priority, profile, record)
+        else:
+            flight_key = cache_key or response_cache.make_key(
+                message, (context or {}).get("system_instruction"), profile.model or self.model_name
+            )
+            try:
+                # A caller joining someone else's flight still only waits as long as it has
+                ai_response, shared = await asyncio.wait_for(
+                    gemini_single_flight.do(flight_key, lambda: self._generate_uncached(message, context, priority, profile, record)),
+                    deadline.budget()
+                )
+            except asyncio.TimeoutError:
+                deadline.deadline_policy.record_fallback("llm")
+                return get_mock_response(message, is_fallback=True)
+            if shared:
+                print(f"🔗 Joined in-flight LLM request")
+                return {**ai_response, "coalesced": True}
+        self._count_deadline_fallback(ai_response)
+
+        # Never pin a fallback answer in the cache
+        if cache_key and not ai_response.get("is_mock"):
+            response_cache.set(cache_key, ai_response)
+        return ai_response
+
+    async def _generate_uncached(self, message: str, context: Dict[str, Any], priority: str, profile: RouteProfile,
+                                 record: Optional[CallRecord] = None):
+        """Generate behind the circuit breaker, within the route's latency budget"""
+        payload = build_chat_payload(
+            message, context, temperature=profile.temperature, max_output_tokens=profile.max_output_tokens
+        )
+        text = await self._call(payload, priority, profile, record)
+        if text is None:
+            return get_mock_response(message, is_fallback=True)
+        return self._result(text, profile)
+
+    async def _call(self, payload: Dict[str, Any], priority: str, profile: RouteProfile,
+                    record: Optional[CallRecord] = None) -> Optional[str]:
+        """One guarded generate call; None means serve a fallback
+
+        The call gets the route's latency budget or what is left of the
+        request's deadline, whichever is shorter. A deadline cut-off is
+        counted by the caller that serves the fallback for it.
+        """
+        budget = deadline.budget(profile.latency_budget_seconds)
+        if budget <= 0:
+            return None
+
+        breaker = self._breaker("generate", profile)
+        if not breaker.allow_request():
+            print(f"⛔ Circuit open for {breaker.name} - serving fallback")
+            return None
+
+        try:
+            print(f"📡 Sending request to {self.backend.name} backend ({profile.name} route)...")
+            result = await profile.hedge.run(
+                lambda: self._attempt(payload, priority, profile, record),
+                lambda r: True,
+                budget_seconds=budget
+            )
+            breaker.record_success()
+            return result["text"]
+        except asyncio.TimeoutError:
+            # Running out of the caller's time says nothing about the upstream
+            if budget < profile.latency_budget_seconds:
+                breaker.release_probe()
+            else:
+                breaker.record_failure()
+                print(f"❌ LLM error: latency budget of {budget:.1f}s exceeded")
+        except BackendError as e:
+            # Only throttling, server errors and transport failures say the upstream is unhealthy
+            if e.upstream_unhealthy:
+                breaker.record_failure()
+            else:
+                breaker.release_probe()
+            print(f"❌ LLM error ({e.kind}): {e}")
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            print(f"❌ LLM error: {e!r}")
+        return None
+
+    async def _attempt(self, payload: Dict[str, Any], priority: str, profile: RouteProfile,
+                       record: Optional[CallRecord] = None):
+        """One backend call: scheduler slot, controller feedback, instrumentation"""
+        async with llm_scheduler.slot(priority):
+            request_start = time.perf_counter()
+            try:
+                result = await self.backend.generate(payload, model=profile.model)
+            except BackendError as e:
+                latency_ms = (time.perf_counter() - request_start) * 1000
+                if e.kind == "timeout":
+                    concurrency_controller.on_timeout()
+                elif e.status_code is not None:
+                    concurrency_controller.on_response(e.status_code, latency_ms, self._latency_series(profile, False))
+                llm_instrumentation.record(self.backend.name, latency_ms, error=e.kind)
+                model_router.instrumentation.record(profile.name, latency_ms, error=e.kind)
+                raise
+            latency_ms = (time.perf_counter() - request_start) * 1000
+            concurrency_controller.on_response(200, latency_ms, self._latency_series(profile, False))
+            profile.hedge.record_latency(latency_ms)
+            llm_instrumentation.record(
+                self.backend.name, latency_ms, result.get("prompt_tokens"), result.get("output_tokens")
+            )
+            model_router.instrumentation.record(
+                profile.name, latency_ms, result.get("prompt_tokens"), result.get("output_tokens")
+            )
+            if record is not None:
+                record.add_usage(result.get("prompt_tokens"), result.get("output_tokens"))
+            return result
+
+    async def stream_response(self, message: str, context: Dict[str, Any] = None, priority: str = "chat"):
+        """Yield response chunks as the backend produces them
+
+        Each chunk is a dict with the new "text" plus "model_used"/"is_mock",
+        so callers can build the same metadata as generate_response.
+        """
+        record = llm_call_metrics.start("stream")
+        first = None
+        try:
+            async with aclosing(self._stream_response(message, context, priority, record)) as chunks:
+                async for chunk in chunks:
+                    if first is None and chunk.get("text"):
+                        first = chunk
+                        record.first_token()
+                    yield chunk
+        finally:
+            first = first or {}
+            llm_call_metrics.finish(record, self._outcome(first), first.get("model_used"), first.get("route"))
+
+    async def _stream_response(self, message: str, context: Dict[str, Any], priority: str, record: CallRecord):
+        if self.mock_mode:
+            async for chunk in self._stream_mock_response(message):
+                yield chunk
+            return
+
+        route = model_router.route(message, context)
+        if route == "rules":
+            response = self._rule_response(message)
+            yield {"text": response["content"], **response}
+            return
+        profile = model_router.profile(route)
+
+        cache_key = self._cache_key(message, context, profile)
+        if cache_key:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ Response cache hit (stream)")
+                yield {
+                    "text": cached["content"],
+                    "model_used": cached["model_used"],
+                    "route": profile.name,
+                    "is_mock": False,
+                    "cached": True
+                }
+                return
+
+        budget = deadline.budget(profile.latency_budget_seconds)
+        breaker = self._breaker("stream", profile)
+        if budget <= 0 or not breaker.allow_request():
+            if budget <= 0:
+                deadline.deadline_policy.record_fallback("llm stream")
+            else:
+                print(f"⛔ Circuit open for {breaker.name} - serving fallback")
+            async for chunk in self._stream_mock_response(message, is_fallback=True):
+                yield chunk
+            return
+
+        streamed_parts = []
+        usage = {}
+        error_kind = None
+        request_start = time.perf_counter()
+        try:
+            print(f"📡 Streaming request to {self.backend.name} backend ({profile.name} route)...")
+            payload = build_chat_payload(
+                message, context, temperature=profile.temperature, max_output_tokens=profile.max_output_tokens
+            )
+
+            # The budget bounds the wait for a slot and for each chunk, the first one included
+            async with llm_scheduler.slot(priority, timeout=budget):
+                request_start = time.perf_counter()
+                first_chunk = True
+                async with aclosing(self.backend.stream(payload, timeout=budget, model=profile.model)) as chunks:
+                    async for chunk in chunks:
+                        if first_chunk:
+                            concurrency_controller.on_response(
+                                200, (time.perf_counter() - request_start) * 1000, self._latency_series(profile, True)
+                            )
+                            breaker.record_success()
+                            first_chunk = False
+                        if chunk.get("output_tokens") is not None:
+                            usage = chunk
+                        if chunk.get("text"):
+                            streamed_parts.append(chunk["text"])
+                            yield {
+                                "text": chunk["text"],
+                                "model_used": self.backend.model_display_name(profile.model),
+                                "route": profile.name,
+                                "is_mock": False
+                            }
+                        if deadline.expired():
+                            error_kind = "deadline"
+                            deadline.deadline_policy.record_fallback("llm stream")
+                            break
+
+            # A stream cut short by the deadline is not a complete answer to cache
+            if streamed_parts and cache_key and error_kind is None:
+                response_cache.set(cache_key, self._result("".join(streamed_parts), profile))
+
+        except asyncio.TimeoutError:
+            # No slot within the budget - the queue is the problem, not the upstream
+            error_kind = "deadline"
+            breaker.release_probe()
+            deadline.deadline_policy.record_fallback("llm stream")
+
+        except BackendError as e:
+            if e.kind == "timeout" and budget < profile.latency_budget_seconds:
+                # The request's deadline ran out, not the upstream's patience
+                error_kind = "deadline"
+                breaker.release_probe()
+                deadline.deadline_policy.record_fallback("llm stream")
+            else:
+                error_kind = e.kind
+                if e.kind == "timeout":
+                    concurrency_controller.on_timeout()
+                elif e.status_code is not None:
+                    concurrency_controller.on_response(
+                        e.status_code, (time.perf_counter() - request_start) * 1000, self._latency_series(profile, True)
+                    )
+                if e.upstream_unhealthy:
+                    breaker.record_failure()
+                else:
+                    breaker.release_probe()
+                print(f"❌ LLM stream error ({e.kind}): {e}")
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            error_kind = "transport"
+            breaker.record_failure()
+            print(f"❌ LLM stream error: {e!r}")
+
+        latency_ms = (time.perf_counter() - request_start) * 1000
+        llm_instrumentation.record(
+            self.backend.name, latency_ms, usage.get("prompt_tokens"), usage.get("output_tokens"), error=error_kind
+        )
+        model_router.instrumentation.record(
+            profile.name, latency_ms, usage.get("prompt_tokens"), usage.get("output_tokens"), error=error_kind
+        )
+        record.add_usage(usage.get("prompt_tokens"), usage.get("output_tokens"))
+
+        # Only fall back if nothing reached the caller yet; a half-real,
+        # half-canned answer would be worse than a short one
+        if not streamed_parts:
+            async for chunk in self._stream_mock_response(message, is_fallback=True):
+                yield chunk
+
+    async def _stream_mock_response(self, message: str, is_fallback: bool = False, words_per_chunk: int = 6):
+        """Replay a mock response as word-sized chunks"""
+        mock = get_mock_response(message, is_fallback=is_fallback)
+        words = re.findall(r'\S+\s*', mock["content"])
+        for i in range(0, len(words), words_per_chunk):
+            yield {
+                "text": "".join(words[i:i + words_per_chunk]),
+                "model_used": mock["model_used"],
+                "is_mock": True
+            }
+
+    async def analyze_medical_text(self, text: str):
+        """Analyze medical text, behind interactive traffic
+
+        Returns ANALYSIS_SCHEMA's fields (summary, symptoms,
+        possible_conditions, urgency, recommendations, red_flags) plus
+        "analysis" (the summary) and "is_mock". Gemini is asked for JSON in
+        that shape and the answer is validated in the same round trip; the
+        same text is answered from the analysis cache.
+        """
+        record = llm_call_metrics.start("analysis")
+        profile = model_router.profile("heavy")
+        result = await self._analyze(text, profile, record)
+        model = result.get("model_used") or self.backend.model_display_name(profile.model)
+        llm_call_metrics.finish(record, self._outcome(result), model, profile.name)
+        return result
+
+    def _analysis_key(self, text: str, profile: RouteProfile, kind: str = "analysis") -> str:
+        """Analysis cache key: the kind of call, text (whitespace-insensitive), model and schema version"""
+        raw = "\x1f".join([kind, str(ANALYSIS_SCHEMA_VERSION), profile.model or self.model_name or "", " ".join(text.split())])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _analyze(self, text: str, profile: RouteProfile, record: CallRecord):
+        if self.mock_mode:
+            return get_mock_analysis(text)
+
+        cache_key = self._analysis_key(text, profile)
+        if analysis_cache.enabled:
+            cached = analysis_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ Analysis cache hit")
+                return {**cached, "cached": True}
+
+        # The same document submitted twice at once is analyzed once
+        try:
+            result, shared = await asyncio.wait_for(
+                gemini_single_flight.do(cache_key, lambda: self._analyze_uncached(text, profile, record)),
+                deadline.budget()
+            )
+        except asyncio.TimeoutError:
+            deadline.deadline_policy.record_fallback("llm")
+            return get_mock_analysis(text, True)
+        if shared:
+            return {**result, "coalesced": True}
+        self._count_deadline_fallback(result)
+
+        if analysis_cache.enabled and not result.get("is_mock"):
+            analysis_cache.set(cache_key, result, size=len(json.dumps(result).encode("utf-8")))
+        return result
+
+    async def _analyze_uncached(self, text: str, profile: RouteProfile, record: CallRecord):
+        answer = await self._call(build_analysis_payload(text), "batch", profile, record)
+        if answer is None:
+            return get_mock_analysis(text, True)
+
+        fields, errors = parse_structured(answer, ANALYSIS_SCHEMA)
+        if fields is None:
+            # No second round trip to repair it - the fallback is already safe to show
+            print(f"❌ Analysis did not match the schema: {'; '.join(errors[:3])}")
+            return get_mock_analysis(text, True)
+
+        return {
+            **fields,
+            "analysis": fields["summary"],
+            "model_used": self.backend.model_display_name(profile.model),
+            "is_mock": False
+        }
+
+    async def merge_analyses(self, analyses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """One analysis of a whole document from analyses of its sections (ANALYSIS_SCHEMA's fields)
+
+        The reduce step of llm/document_analysis.py. None when the model is
+        unavailable or its answer does not match the schema - the caller
+        merges the sections itself then. Cached like analyses, by the
+        sections' findings.
+        """
+        record = llm_call_metrics.start("analysis_merge")
+        profile = model_router.profile("heavy")
+        model = self.backend.model_display_name(profile.model)
+        if self.mock_mode:
+            llm_call_metrics.finish(record, "mock", model, profile.name)
+            return None
+
+        sections = [{name: analysis.get(name) for name in ANALYSIS_SCHEMA["properties"]} for analysis in analyses]
+        cache_key = self._analysis_key(json.dumps(sections, sort_keys=True), profile, kind="merge")
+        cached = analysis_cache.get(cache_key) if analysis_cache.enabled else None
+        if cached is not None:
+            llm_call_metrics.finish(record, "cached", model, profile.name)
+            return {**cached, "cached": True}
+
+        answer = await self._call(build_merge_payload(sections), "batch", profile, record)
+        if answer is None:
+            self._count_deadline_fallback(None)
+        fields, errors = parse_structured(answer, ANALYSIS_SCHEMA) if answer is not None else (None, [])
+        if fields is None:
+            if errors:
+                print(f"❌ Merged analysis did not match the schema: {'; '.join(errors[:3])}")
+            llm_call_metrics.finish(record, "fallback", model, profile.name)
+            return None
+
+        result = {**fields, "model_used": model}
+        if analysis_cache.enabled:
+            analysis_cache.set(cache_key, result, size=len(json.dumps(result).encode("utf-8")))
+        llm_call_metrics.finish(record, "real", model, profile.name)
+        return result
+
+    async def summarize_conversation(self, summary: str, turns, max_output_tokens: int = 250) -> str:
+        """Fold turns into a conversation's running summary, behind interactive traffic"""
+        record = llm_call_metrics.start("summary")
+        profile = model_router.profile("fast")
+        model = self.backend.model_display_name(profile.model)
+        if self.mock_mode:
+            llm_call_metrics.finish(record, "mock", model, profile.name)
+            return get_mock_summary(summary, turns)
+
+        text = await self._call(
+            build_summary_payload(summary, turns, max_output_tokens), "batch", profile, record
+        )
+        if not text or not text.strip():
+            llm_call_metrics.finish(record, "fallback", model, profile.name)
+            return get_mock_summary(summary, turns)
+        llm_call_metrics.finish(record, "real", model, profile.name)
+        return text.strip()
@@ -0,0 +1,241 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from utils.http_transport import PooledTransport, gemini_transport
+from utils.key_pool import ApiKey
+
+# Statuses Gemini answers when a cachedContent named in a request is gone
+# (expired early, deleted, or created under another project)
+STALE_CACHE_STATUSES = {400, 403, 404}
+
+
+def is_stale_cache_error(status_code: int, body: str) -> bool:
+    """The request failed because of its cachedContent, not because of anything else in it"""
+    return status_code in STALE_CACHE_STATUSES and "cache" in (body or "").lower()
+
+
+class CachedContext:
+    """One cachedContents resource: a system instruction stored on Gemini's side"""
+
+    __slots__ = ("name", "model", "api_key", "tokens", "expires", "last_used", "hits", "refreshing")
+
+    def __init__(self, name: str, model: str, api_key: ApiKey, tokens: int, expires: float):
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self.tokens = tokens
+        self.expires = expires
+        self.last_used = time.monotonic()
+        self.hits = 0
+        self.refreshing = False
+
+
+class ContextCacheManager:
+    """Serves long, repeated system instructions from Gemini's context cache
+
+    The first request with a given system instruction goes out inline and
+    creates a cachedContents resource in the background; later requests
+    with the same instruction, model and API key (caches belong to the
+    key's project) name the cache instead of re-sending it. Handles are
+    refreshed while in use (CONTEXT_CACHE_TTL), left to expire once idle,
+    evicted least-recently-used beyond CONTEXT_CACHE_MAX_ENTRIES, and
+    deleted at shutdown. Instructions below CONTEXT_CACHE_MIN_TOKENS
+    (Gemini's minimum cache size) always go inline.
+
+    Off unless CONTEXT_CACHE=true: the stock persona and patient context
+    come to ~150 tokens, far below that minimum, so it only pays off for
+    callers that send long system instructions (clinic protocols,
+    formularies). Cached tokens Gemini reports on its own (implicit
+    caching of the stable system-instruction prefix) are counted either way.
+    """
+
+    def __init__(self, transport: PooledTransport = gemini_transport, enabled: Optional[bool] = None,
+                 ttl_seconds: Optional[float] = None, min_tokens: Optional[int] = None,
+                 max_entries: Optional[int] = None, api_version: Optional[str] = None):
+        self.transport = transport
+        self.enabled = enabled if enabled is not None else os.getenv("CONTEXT_CACHE", "false").lower() == "true"
+        self.ttl_seconds = ttl_seconds or float(os.getenv("CONTEXT_CACHE_TTL", "600"))
+        self.min_tokens = min_tokens or int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+        self.max_entries = max_entries or int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "200"))
+        self.api_version = api_version or os.getenv("GEMINI_API_VERSION", "v1beta")
+        # A handle this close to expiry could lapse before Gemini reads it
+        self.expiry_margin = min(5.0, self.ttl_seconds / 10)
+
+        # (key label, model, digest) -> handle, least recently used first
+        self._handles: "OrderedDict[Tuple[str, str, str], CachedContext]" = OrderedDict()
+        # Same key -> monotonic time before which creation is not retried
+        self._failed: Dict[Tuple[str, str, str], float] = {}
+        self._creating: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self._tasks = set()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "created": 0,
+            "create_failed": 0,
+            "refreshed": 0,
+            "expired": 0,
+            "evicted": 0,
+            "invalidated": 0,
+            "deleted": 0,
+            "skipped_small": 0,
+            "cached_tokens": 0,
+        }
+
+    def apply(self, payload: Dict[str, Any], model: str, api_key: ApiKey):
+        """Request body to send with this key, and the cache handle it names (None = inline)"""
+        system = payload.get("systemInstruction")
+        if not self.enabled or not system:
+            return payload, None
+        text = "".join(part.get("text", "") for part in system.get("parts", []))
+        if len(text) // 4 < self.min_tokens:
+            self.stats["skipped_small"] += 1
+            return payload, None
+
+        cache_key = (api_key.label, model, hashlib.sha256(text.encode()).hexdigest())
+        now = time.monotonic()
+        handle = self._handles.get(cache_key)
+        if handle is not None and handle.expires - now < self.expiry_margin:
+            del self._handles[cache_key]
+            self.stats["expired"] += 1
+            handle = None
+
+        if handle is None:
+            self.stats["misses"] += 1
+            if self._failed.get(cache_key, 0) <= now and cache_key not in self._creating:
+                self._spawn(self._create(cache_key, system, model, api_key), cache_key)
+            return payload, None
+
+        self.stats["hits"] += 1
+        handle.hits += 1
+        handle.last_used = now
+        self._handles.move_to_end(cache_key)
+        if handle.expires - now < self.ttl_seconds / 2 and not handle.refreshing:
+            handle.refreshing = True
+            self._spawn(self._refresh(handle))
+
+        body = {key: value for key, value in payload.items() if key != "systemInstruction"}
+        body["cachedContent"] = handle.name
+        return body, handle
+
+    def record_usage(self, cached_tokens: Optional[int]):
+        if cached_tokens:
+            self.stats["cached_tokens"] += cached_tokens
+
+    def invalidate(self, handle: CachedContext):
+        """Gemini rejected the handle; forget it and send inline for a while"""
+        for cache_key, known in list(self._handles.items()):
+            if known is handle:
+                del self._handles[cache_key]
+                self._failed[cache_key] = time.monotonic() + self.ttl_seconds
+        self.stats["invalidated"] += 1
+        print(f"🗃️  Context cache {handle.name} rejected - sending inline")
+
+    def _spawn(self, coro, cache_key=None):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if cache_key is not None:
+            self._creating[cache_key] = task
+            task.add_done_callback(lambda _: self._creating.pop(cache_key, None))
+
+    async def _create(self, cache_key, system: Dict[str, Any], model: str, api_key: ApiKey):
+        try:
+            response = await self.transport.post(
+                f"/{self.api_version}/cachedContents",
+                params={"key": api_key.value},
+                json={"model": f"models/{model}", "systemInstruction": system, "ttl": f"{int(self.ttl_seconds)}s"},
+                timeout=10
+            )
+        except Exception as e:
+            response = None
+            error = repr(e)
+        else:
+            error = response.text[:200]
+        if response is None or response.status_code != 200:
+            # Too small, unsupported model, quota... - don't ask again every request
+            self._failed[cache_key] = time.monotonic() + self.ttl_seconds
+            self.stats["create_failed"] += 1
+            print(f"⚠️ Context cache not created for {model}: {error}")
+            return
+
+        result = response.json()
+        tokens = (result.get("usageMetadata") or {}).get("totalTokenCount") or 0
+        self._handles[cache_key] = CachedContext(
+            result["name"], model, api_key, tokens, time.monotonic() + self.ttl_seconds
+        )
+        self.stats["created"] += 1
+        print(f"🗃️  Context cache {result['name']} created ({tokens} tokens, {model}, key '{api_key.label}')")
+        self._prune()
+        while len(self._handles) > self.max_entries:
+            _, evicted = self._handles.popitem(last=False)
+            self.stats["evicted"] += 1
+            self._spawn(self._delete(evicted))
+
+    def _prune(self):
+        """Forget handles that expired without being used again"""
+        now = time.monotonic()
+        for cache_key, handle in list(self._handles.items()):
+            if handle.expires <= now:
+                del self._handles[cache_key]
+                self.stats["expired"] += 1
+        self._failed = {cache_key: until for cache_key, until in self._failed.items() if until > now}
+
+    async def _refresh(self, handle: CachedContext):
+        try:
+            response = await self.transport.request(
+                "PATCH",
+                f"/{self.api_version}/{handle.name}",
+                params={"key": handle.api_key.value, "updateMask": "ttl"},
+                json={"ttl": f"{int(self.ttl_seconds)}s"},
+                timeout=10
+            )
+            if response.status_code == 200:
+                handle.expires = time.monotonic() + self.ttl_seconds
+                self.stats["refreshed"] += 1
+        except Exception as e:
+            print(f"⚠️ Context cache refresh failed for {handle.name}: {e!r}")
+        finally:
+            handle.refreshing = False
+
+    async def _delete(self, handle: CachedContext):
+        try:
+            await self.transport.request(
+                "DELETE", f"/{self.api_version}/{handle.name}", params={"key": handle.api_key.value}, timeout=5
+            )
+            self.stats["deleted"] += 1
+        except Exception as e:
+            print(f"⚠️ Context cache delete failed for {handle.name}: {e!r}")
+
+    async def stop(self):
+        """Delete live caches (they bill storage until they expire) and stop background work"""
+        for task in list(self._tasks):
+            task.cancel()
+        handles = [handle for handle in self._handles.values() if handle.expires > time.monotonic()]
+        self._handles.clear()
+        if handles:
+            await asyncio.gather(*(self._delete(handle) for handle in handles), return_exceptions=True)
+            print(f"🗃️  Deleted {len(handles)} context caches")
+
+    def get_stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False, "cached_tokens": self.stats["cached_tokens"]}
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._handles),
+            "config": {
+                "ttl_seconds": self.ttl_seconds,
+                "min_tokens": self.min_tokens,
+                "max_entries": self.max_entries,
+            },
+        }
+
+
+# Shared context cache for the REST backend
+gemini_context_cache = ContextCacheManager()
@@ -0,0 +1,74 @@
+import os
+from typing import Dict, Any, Optional
+
+from utils.intent_matcher import CRISIS_CATEGORIES, crisis_category
+
+# Safety messages sent before the LLM answers a crisis message. Any wording
+# change needs clinical review; bump the version so every served message can
+# be traced back to the text that was approved.
+SAFETY_RESPONSES_VERSION = "1"
+
+SAFETY_RESPONSES = {
+    "self_harm": (
+        "🆘 I'm really glad you reached out, and I want you to be safe right now.\n\n"
+        "• If you might act on these thoughts or have taken something, call 911 now "
+        "or go to the nearest emergency room.\n"
+        "• You can call or text 988 (Suicide & Crisis Lifeline, US) any time, day or night, "
+        "to talk with someone who is trained to help.\n"
+        "• If you can, stay with or call someone you trust and move away from anything "
+        "you could use to hurt yourself.\n\n"
+        "You don't have to go through this alone. I'm here and will keep talking with you."
+    ),
+    "medical": (
+        "🚨 This could be a medical emergency.\n\n"
+        "• Call 911 (or your local emergency number) now - don't wait to see if it passes.\n"
+        "• Don't drive yourself. Unlock the door and stay where responders can reach you.\n"
+        "• If someone is with you, ask them to stay and follow the dispatcher's instructions.\n\n"
+        "I'll share more guidance in a moment, but please make the call first."
+    ),
+    "panic": (
+        "💙 You're not alone - panic attacks feel frightening, but they pass.\n\n"
+        "• Breathe slowly: in for 4 seconds, hold for 4, out for 6. Repeat a few times.\n"
+        "• Ground yourself: name 5 things you can see, 4 you can touch, 3 you can hear.\n"
+        "• If you have chest pain, trouble breathing that doesn't ease, or feel faint, "
+        "call 911 right away.\n\n"
+        "I'm here with you and will share more in a moment."
+    ),
+}
+
+CATEGORY_ORDER = list(CRISIS_CATEGORIES)
+
+
+class CrisisTriage:
+    """Pre-LLM triage that picks the safety message for a crisis message
+
+    The streaming endpoints (/chat/stream, /chat/ws) send the safety message
+    before the first token, and the LLM's answer follows on the same
+    connection; POST /chat puts it at the top of the full answer.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("CRISIS_FAST_PATH", "true").lower() == "true"
+        self.stats = {"triaged": {category: 0 for category in CATEGORY_ORDER}}
+
+    def triage(self, message: str) -> Optional[Dict[str, str]]:
+        """{"category", "response", "version"} for a crisis message, None otherwise"""
+        if not self.enabled:
+            return None
+        category = crisis_category(message)
+        if category is None:
+            return None
+        self.stats["triaged"][category] += 1
+        print(f"🆘 Crisis triage: {category} - safety message goes first")
+        return {"category": category, "response": SAFETY_RESPONSES[category], "version": SAFETY_RESPONSES_VERSION}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "safety_responses_version": SAFETY_RESPONSES_VERSION,
+        }
+
+
+# Shared triage for the chat endpoints
+crisis_triage = CrisisTriage()
@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+from contextlib import aclosing
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
+
+from llm import llm_client
+from llm.prompts import URGENCY_LEVELS
+
+# Lines longer than this are split into sentences before chunking
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _segments(text: str, max_chars: int) -> List[str]:
+    """Lines, with over-long ones split into sentences and then hard-cut"""
+    segments = []
+    for line in text.splitlines(keepends=True):
+        if len(line) <= max_chars // 2:
+            segments.append(line)
+            continue
+        for sentence in SENTENCE_SPLIT.split(line):
+            for start in range(0, len(sentence), max_chars // 2):
+                segments.append(sentence[start:start + max_chars // 2] + " ")
+    return [segment for segment in segments if segment.strip()]
+
+
+def _is_cut_point(segment: str, cut_every: int) -> bool:
+    digest = hashlib.md5(segment.strip().encode("utf-8")).digest()
+    return digest[0] % cut_every == 0
+
+
+def split_chunks(text: str, max_chars: int = 4000, overlap_chars: int = 400, cut_every: int = 4) -> List[str]:
+    """Split a document into overlapping chunks of at most about max_chars
+
+    Chunks end where a line's own hash says so (once they are at least
+    half full) rather than at fixed offsets, so an edit only changes the
+    chunk it lands in and the one after it (through the overlap); the rest
+    keep their text, and their cached analysis. Each chunk after the first
+    starts with up to overlap_chars of the previous chunk's last lines so
+    findings that straddle a boundary are seen whole.
+    """
+    segments = _segments(text, max_chars)
+    groups: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for index, segment in enumerate(segments):
+        current.append(segment)
+        size += len(segment)
+        following = len(segments[index + 1]) if index + 1 < len(segments) else 0
+        if (size >= max_chars // 2 and _is_cut_point(segment, cut_every)) or size + following > max_chars:
+            groups.append(current)
+            current, size = [], 0
+    if current:
+        groups.append(current)
+
+    chunks = []
+    for index, group in enumerate(groups):
+        overlap: List[str] = []
+        if index:
+            for segment in reversed(groups[index - 1]):
+                if sum(len(s) for s in overlap) + len(segment) > overlap_chars:
+                    break
+                overlap.insert(0, segment)
+        chunks.append("".join(overlap + group).strip())
+    return chunks
+
+
+def _merge_lists(lists: List[List[str]], limit: int = 20) -> List[str]:
+    """Union keeping first-seen order, ignoring case"""
+    merged, seen = [], set()
+    for items in lists:
+        for item in items:
+            key = item.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item.strip())
+    return merged[:limit]
+
+
+def _max_urgency(levels: List[str]) -> str:
+    ranks = [URGENCY_LEVELS.index(level) for level in levels if level in URGENCY_LEVELS]
+    return URGENCY_LEVELS[max(ranks)] if ranks else "medium"
+
+
+def merge_findings(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk analyses without a model: unions, and the highest urgency any chunk found"""
+    return {
+        "summary": " ".join(result.get("summary", "") for result in results).strip(),
+        "symptoms": _merge_lists([result.get("symptoms", []) for result in results]),
+        "possible_conditions": _merge_lists([result.get("possible_conditions", []) for result in results]),
+        "urgency": _max_urgency([result.get("urgency") for result in results]),
+        "recommendations": _merge_lists([result.get("recommendations", []) for result in results]),
+        "red_flags": _merge_lists([result.get("red_flags", []) for result in results]),
+    }
+
+
+class DocumentAnalyzer:
+    """Map-reduce analysis of long medical documents (lab reports, prescriptions)
+
+    Documents longer than ANALYSIS_CHUNK_CHARS are split into overlapping
+    chunks (see split_chunks). Each is analyzed with analyze_medical_text,
+    up to ANALYSIS_MAX_PARALLEL at once at batch priority in the LLM
+    scheduler, so chunk results are validated, coalesced and cached by
+    their text like any analysis: re-submitting an edited document only
+    re-analyzes the chunks that changed. A reduce call (merge_analyses)
+    then merges the chunk findings into one analysis. The merge never
+    lowers the urgency or drops a red flag a chunk found, and if the reduce
+    call fails the findings are merged without it (merge_findings).
+    """
+
+    def __init__(self, client=llm_client, chunk_chars: Optional[int] = None, overlap_chars: Optional[int] = None,
+                 max_parallel: Optional[int] = None):
+        self.client = client
+        self.chunk_chars = chunk_chars or int(os.getenv("ANALYSIS_CHUNK_CHARS", "4000"))
+        self.overlap_chars = overlap_chars or int(os.getenv("ANALYSIS_CHUNK_OVERLAP", "400"))
+        self.max_parallel = max_parallel or int(os.getenv("ANALYSIS_MAX_PARALLEL", "4"))
+        self.stats = {
+            "documents": 0,
+            "chunked_documents": 0,
+            "chunks": 0,
+            "chunks_cached": 0,
+            "chunks_failed": 0,
+            "reduce_fallbacks": 0,
+        }
+
+    async def analyze(self, text: str) -> Optional[Dict[str, Any]]:
+        """The `done` event's data ({"analysis", "chunks", "processing_time"}) without the progress, None if it never came"""
+        async with aclosing(self.analyze_stream(text)) as events:
+            async for event, data in events:
+                if event == "done":
+                    return data
+        return None
+
+    async def analyze_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """(event, data) progress: `chunks` (the plan), `chunk` as each finishes, `reduce`, then `done`"""
+        start = time.perf_counter()
+        self.stats["documents"] += 1
+        chunks = split_chunks(text, self.chunk_chars, self.overlap_chars) if len(text) > self.chunk_chars else [text]
+        self.stats["chunks"] += len(chunks)
+        yield "chunks", {"count": len(chunks), "chars": len(text)}
+
+        if len(chunks) == 1:
+            result = await self.client.analyze_medical_text(text)
+            self._count_chunk(result)
+            yield "chunk", self._progress(0, 1, result)
+            yield "done", self._done(result, 1, start)
+            return
+
+        self.stats["chunked_documents"] += 1
+        limit = asyncio.Semaphore(self.max_parallel)
+
+        async def run(index: int, chunk: str):
+            async with limit:
+                return index, await self.client.analyze_medical_text(chunk)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        tasks = [asyncio.create_task(run(index, chunk)) for index, chunk in enumerate(chunks)]
+        try:
+            for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                index, result = await next_result
+                results[index] = result
+                self._count_chunk(result)
+                yield "chunk", {**self._progress(index, len(chunks), result), "completed": done}
+        finally:
+            # A client that went away stops the chunks still waiting for a slot
+            for task in tasks:
+                task.cancel()
+
+        yield "reduce", {"chunks": len(chunks)}
+        yield "done", self._done(await self._reduce(results), len(chunks), start)
+
+    async def _reduce(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One analysis from the chunk analyses"""
+        analyzed = [result for result in results if not result.get("is_mock")]
+        merged = merge_findings(analyzed or results)
+        if not analyzed:
+            # Every chunk fell back; there is nothing real to reduce
+            return {**merged, "analysis": merged["summary"], "is_mock": True}
+
+        reduced = await self.client.merge_analyses(analyzed)
+        if reduced is None:
+            self.stats["reduce_fallbacks"] += 1
+            reduced = {}
+        final = {
+            "summary": reduced.get("summary") or merged["summary"],
+            "symptoms": reduced.get("symptoms") or merged["symptoms"],
+            "possible_conditions": reduced.get("possible_conditions") or merged["possible_conditions"],
+            "urgency": _max_urgency([merged["urgency"], reduced.get("urgency")]),
+            "recommendations": reduced.get("recommendations") or merged["recommendations"],
+            "red_flags": _merge_lists([merged["red_flags"], reduced.get("red_flags", [])]),
+        }
+        return {
+            **final,
+            "analysis": final["summary"],
+            "model_used": reduced.get("model_used") or analyzed[0].get("model_used"),
+            "is_mock": False,
+            "partial": len(analyzed) < len(results),
+        }
+
+    def _count_chunk(self, result: Dict[str, Any]):
+        if result.get("cached"):
+            self.stats["chunks_cached"] += 1
+        elif result.get("is_mock") and not self.client.mock_mode:
+            self.stats["chunks_failed"] += 1
+
+    def _progress(self, index: int, total: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "total": total,
+            "cached": bool(result.get("cached")),
+            "failed": bool(result.get("is_mock")) and not self.client.mock_mode,
+            "urgency": result.get("urgency"),
+            "red_flags": result.get("red_flags", []),
+        }
+
+    @staticmethod
+    def _done(result: Dict[str, Any], chunks: int, start: float) -> Dict[str, Any]:
+        return {
+            "analysis": result,
+            "chunks": chunks,
+            "processing_time": f"{time.perf_counter() - start:.2f}s",
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "config": {
+                "chunk_chars": self.chunk_chars,
+                "overlap_chars": self.overlap_chars,
+                "max_parallel": self.max_parallel,
+            },
+        }
+
+
+# Shared pipeline for the analysis endpoints
+document_analyzer = DocumentAnalyzer()
@@ -0,0 +1,267 @@
+import time
+from collections import deque
+from typing import Dict, Any, Optional, List
+
+from utils.llm_scheduler import percentile
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 32768, 131072)
+
+
+class BackendInstrumentation:
+    """Identical latency, token and error accounting for every backend
+
+    Kept per backend name so two backends run under the same load can be
+    compared side by side.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._backends: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, backend: str) -> Dict[str, Any]:
+        entry = self._backends.get(backend)
+        if entry is None:
+            entry = self._backends[backend] = {
+                "calls": 0,
+                "successes": 0,
+                "errors": {},
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+                "latencies_ms": deque(maxlen=self.window),
+            }
+        return entry
+
+    def record(self, backend: str, latency_ms: float, prompt_tokens: Optional[int] = None,
+               output_tokens: Optional[int] = None, error: Optional[str] = None):
+        entry = self._entry(backend)
+        entry["calls"] += 1
+        if error:
+            entry["errors"][error] = entry["errors"].get(error, 0) + 1
+            return
+        entry["successes"] += 1
+        entry["prompt_tokens"] += prompt_tokens or 0
+        entry["output_tokens"] += output_tokens or 0
+        entry["latencies_ms"].append(latency_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for backend, entry in self._backends.items():
+            latencies = entry["latencies_ms"]
+            total_seconds = sum(latencies) / 1000
+            stats[backend] = {
+                "calls": entry["calls"],
+                "successes": entry["successes"],
+                "errors": dict(entry["errors"]),
+                "error_rate": round(1 - entry["successes"] / entry["calls"], 3) if entry["calls"] else 0.0,
+                "prompt_tokens": entry["prompt_tokens"],
+                "output_tokens": entry["output_tokens"],
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 1),
+                    "p95": round(percentile(latencies, 95), 1),
+                    "p99": round(percentile(latencies, 99), 1),
+                    "max": round(max(latencies), 1) if latencies else 0.0,
+                },
+                "output_tokens_per_sec": round(entry["output_tokens"] / total_seconds, 1) if total_seconds else 0.0,
+            }
+        return stats
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within a bucket
+
+    Unlike a sample window it covers every observation since startup in
+    constant memory, so the tail is never sampled away.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    def get_stats(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 1),
+            "mean": round(self.sum / self.count, 1) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 1),
+            "p95": round(self.quantile(0.95), 1),
+            "p99": round(self.quantile(0.99), 1),
+            "max": round(self.max, 1),
+            "buckets": buckets,
+        }
+
+
+class CallRecord:
+    """What one LLM client call cost, filled in as it runs"""
+
+    __slots__ = ("operation", "start", "ttft_ms", "prompt_tokens", "output_tokens", "upstream_calls")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.start = time.perf_counter()
+        self.ttft_ms: Optional[float] = None
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.upstream_calls = 0
+
+    def add_usage(self, prompt_tokens: Optional[int], output_tokens: Optional[int]):
+        """One upstream call's tokens (hedged calls count every attempt: all of them are paid for)"""
+        self.upstream_calls += 1
+        self.prompt_tokens += prompt_tokens or 0
+        self.output_tokens += output_tokens or 0
+
+    def first_token(self):
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self.start) * 1000
+
+
+class LLMCallMetrics:
+    """Tokens and latency of every answer the LLM client gives, by outcome, model and route
+
+    Outcomes: "real" (answered by the model), "cached", "coalesced" (shared
+    another caller's upstream call), "rules" (rule engine), "mock" (mock
+    mode) and "fallback" (the upstream failed or ran out of time).
+    Time-to-first-token is recorded for streams. Per-minute totals over
+    the last day back the live and throughput metrics.
+    """
+
+    def __init__(self, history_minutes: int = 24 * 60):
+        self.calls = 0
+        self.outcomes: Dict[str, int] = {}
+        self.operations: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.ttft_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.prompt_tokens_per_call = Histogram(TOKEN_BUCKETS)
+        self.output_tokens_per_call = Histogram(TOKEN_BUCKETS)
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        # [minute, calls, tokens, latency_ms sum], oldest first
+        self.minutes = deque(maxlen=history_minutes)
+
+    def start(self, operation: str) -> CallRecord:
+        return CallRecord(operation)
+
+    def finish(self, record: CallRecord, outcome: str, model: Optional[str], route: Optional[str]):
+        latency_ms = (time.perf_counter() - record.start) * 1000
+        tokens = record.prompt_tokens + record.output_tokens
+        self.calls += 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.operations[record.operation] = self.operations.get(record.operation, 0) + 1
+        self.prompt_tokens += record.prompt_tokens
+        self.output_tokens += record.output_tokens
+        self.latency_ms.observe(latency_ms)
+        if record.ttft_ms is not None:
+            self.ttft_ms.observe(record.ttft_ms)
+        if record.upstream_calls:
+            self.prompt_tokens_per_call.observe(record.prompt_tokens)
+            self.output_tokens_per_call.observe(record.output_tokens)
+        for table, label in ((self.models, model or "unknown"), (self.routes, route or "default")):
+            entry = table.get(label)
+            if entry is None:
+                entry = table[label] = {
+                    "calls": 0, "prompt_tokens": 0, "output_tokens": 0, "latency_ms": Histogram(LATENCY_BUCKETS_MS)
+                }
+            entry["calls"] += 1
+            entry["prompt_tokens"] += record.prompt_tokens
+            entry["output_tokens"] += record.output_tokens
+            entry["latency_ms"].observe(latency_ms)
+
+        minute = int(time.time() // 60)
+        if not self.minutes or self.minutes[-1][0] != minute:
+            self.minutes.append([minute, 0, 0, 0.0])
+        self.minutes[-1][1] += 1
+        self.minutes[-1][2] += tokens
+        self.minutes[-1][3] += latency_ms
+
+    def recent(self, seconds: int = 3600) -> Dict[str, Any]:
+        """Calls, tokens and mean latency over the last `seconds`"""
+        since = int((time.time() - seconds) // 60)
+        calls = tokens = 0
+        latency = 0.0
+        for minute, minute_calls, minute_tokens, minute_latency in self.minutes:
+            if minute > since:
+                calls += minute_calls
+                tokens += minute_tokens
+                latency += minute_latency
+        return {
+            "calls": calls,
+            "tokens": tokens,
+            "mean_latency_ms": round(latency / calls, 1) if calls else 0.0,
+        }
+
+    def hourly(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Calls and tokens per hour, oldest first, ending with the current hour"""
+        current_hour = int(time.time() // 3600)
+        totals = {hour: [0, 0] for hour in range(current_hour - hours + 1, current_hour + 1)}
+        for minute, calls, tokens, _ in self.minutes:
+            bucket = totals.get(minute // 60)
+            if bucket is not None:
+                bucket[0] += calls
+                bucket[1] += tokens
+        return [
+            {"hour": hour * 3600, "calls": calls, "tokens": tokens}
+            for hour, (calls, tokens) in totals.items()
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        def breakdown(table):
+            return {
+                label: {**{k: v for k, v in entry.items() if k != "latency_ms"}, "latency_ms": entry["latency_ms"].get_stats()}
+                for label, entry in table.items()
+            }
+
+        return {
+            "calls": self.calls,
+            "outcomes": dict(self.outcomes),
+            "operations": dict(self.operations),
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_ms": self.latency_ms.get_stats(),
+            "ttft_ms": self.ttft_ms.get_stats(),
+            "prompt_tokens_per_call": self.prompt_tokens_per_call.get_stats(),
+            "output_tokens_per_call": self.output_tokens_per_call.get_stats(),
+            "models": breakdown(self.models),
+            "routes": breakdown(self.routes),
+            "last_hour": self.recent(3600),
+        }
+
+
+# Shared accounting for all backends
+llm_instrumentation = BackendInstrumentation()
+# Shared per-call accounting for the LLM client
+llm_call_metrics = LLMCallMetrics()
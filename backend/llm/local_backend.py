@@ -0,0 +1,63 @@
+import os
+import re
+import random
+import asyncio
+from typing import Dict, Any, Optional, AsyncIterator
+
+from llm.base import LLMBackend, BackendError, BackendTimeout
+from utils.canned_answers import simulated_answer, payload_text, estimate_tokens
+
+
+class LocalStandInBackend(LLMBackend):
+    """In-process Gemini stand-in with realistic timing, for capacity tests without quota
+
+    Answers are the canned responses, but delivered after a simulated
+    time-to-first-token and at a simulated token rate, so the whole client
+    pipeline (scheduler, cache, breaker) behaves as it would under load.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self.model_name = "local-standin"
+        self.latency_ms = float(os.getenv("LOCAL_LLM_LATENCY_MS", "800"))
+        self.jitter_ms = float(os.getenv("LOCAL_LLM_JITTER_MS", "200"))
+        self.tokens_per_second = float(os.getenv("LOCAL_LLM_TOKENS_PER_SEC", "80"))
+        self.error_rate = float(os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+        self.ready = True
+
+    @property
+    def display_name(self) -> str:
+        return "Local Stand-in"
+
+    def _first_token_delay(self) -> float:
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+    def _maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise BackendError("Injected local stand-in error", 503)
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        text = simulated_answer(payload)
+        output_tokens = estimate_tokens(text)
+        delay = self._first_token_delay() + output_tokens / self.tokens_per_second
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise BackendTimeout(f"Local stand-in timeout after {timeout}s")
+        await asyncio.sleep(delay)
+        self._maybe_fail()
+        return {"text": text, "prompt_tokens": estimate_tokens(payload_text(payload)), "output_tokens": output_tokens}
+
+    async def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                     model: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        text = simulated_answer(payload)
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        words = re.findall(r'\S+\s*', text)
+        for i in range(0, len(words), 6):
+            chunk = "".join(words[i:i + 6])
+            await asyncio.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+            yield {"text": chunk}
+        yield {"text": "", "prompt_tokens": estimate_tokens(payload_text(payload)), "output_tokens": estimate_tokens(text)}
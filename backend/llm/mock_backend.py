@@ -0,0 +1,21 @@
+from typing import Dict, Any, Optional
+
+from llm.base import LLMBackend
+from utils.canned_answers import get_mock_response, payload_message, estimate_tokens
+
+
+class MockBackend(LLMBackend):
+    """Canned answers, no network - used without an API key or with MOCK_MODE=true"""
+
+    name = "mock"
+    is_real = False
+
+    def __init__(self):
+        super().__init__()
+        self.model_name = "Mock Assistant"
+        self.ready = True
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        text = get_mock_response(payload_message(payload))["content"]
+        return {"text": text, "prompt_tokens": 0, "output_tokens": estimate_tokens(text)}
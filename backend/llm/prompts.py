@@ -0,0 +1,239 @@
+import json
+from typing import Dict, Any, List, Optional
+
+from utils.canned_answers import mock_analysis_fields
+
+# Shared prompt building and fallback answers for every LLM backend (the
+# canned chat answers the stand-ins serve are in utils/canned_answers.py)
+
+
+# Persona and answer format for every chat turn; sent as the system
+# instruction so Gemini can cache it (see llm/context_cache.py)
+CHAT_SYSTEM_PROMPT = """You are HealthGuard AI, a professional healthcare assistant. Provide helpful, accurate medical guidance.
+
+Provide a response that:
+1. Acknowledges their concern with empathy
+2. Gives practical, evidence-based advice
+3. Clearly states when to seek professional medical care
+4. Suggests appropriate next steps
+
+Format your response with clear sections using emojis for readability. Be professional but warm."""
+
+# Context fields that change from turn to turn; everything else in the
+# context is stable for the patient and goes in the system instruction
+TURN_CONTEXT_KEYS = ("conversation_id", "timestamp", "mode")
+
+
+def build_chat_payload(message: str, context: Dict[str, Any] = None,
+                       temperature: float = 0.7, max_output_tokens: int = 800) -> Dict[str, Any]:
+    """Build the generateContent request body for a chat turn
+
+    The persona, the caller's system_instruction and the stable patient
+    context form the system instruction - identical across a patient's
+    turns, so it can be served from Gemini's context cache. The turn
+    itself carries the message and what changes per turn.
+
+    Earlier turns in context["history"] (and the running summary of older
+    ones in context["summary"]) are rendered as a transcript rather than
+    dumped with the rest of the context. context["safety_message"] is a
+    crisis safety message the patient has already been shown.
+    """
+    context = dict(context or {})
+    history = context.pop("history", None)
+    summary = context.pop("summary", None)
+    safety_message = context.pop("safety_message", None)
+    system_instruction = context.pop("system_instruction", None)
+    turn_context = {key: context.pop(key) for key in TURN_CONTEXT_KEYS if key in context}
+
+    prompt = f"""{format_history(history, summary)}
+Patient message: "{message}"
+{format_safety_message(safety_message)}
+Context: {turn_context or 'General health consultation'}"""
+
+    return {
+        "systemInstruction": {
+            "parts": [{"text": build_chat_system_text(system_instruction, context)}]
+        },
+        "contents": [{
+            "role": "user",
+            "parts": [{"text": prompt}]
+        }],
+        "generationConfig": {
+            "temperature": temperature,
+            "maxOutputTokens": max_output_tokens,
+        }
+    }
+
+
+def build_chat_system_text(system_instruction: Optional[str], patient_context: Dict[str, Any]) -> str:
+    """System instruction text: persona, the caller's instruction, then stable patient context"""
+    text = CHAT_SYSTEM_PROMPT
+    if system_instruction:
+        text += f"\n\n{system_instruction}"
+    fields = {key: value for key, value in patient_context.items() if value is not None}
+    if fields:
+        text += "\n\nPatient context:\n" + "\n".join(f"- {key}: {value}" for key, value in fields.items())
+    return text
+
+
+def format_transcript(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(
+        f"{'Patient' if turn['role'] == 'user' else 'You'}: {turn['content']}"
+        for turn in turns
+    )
+
+
+def format_safety_message(safety_message: Optional[str]) -> str:
+    """Prompt block telling the model which safety message already went out, so it builds on it"""
+    if not safety_message:
+        return ""
+    return f"""
+The patient has already been shown this safety message:
+---
+{safety_message}
+---
+Do not repeat it. Follow up on it: stay calm and supportive, reinforce its
+most important step, and add guidance specific to what they wrote.
+"""
+
+
+def format_history(history: Optional[List[Dict[str, str]]], summary: Optional[str] = None) -> str:
+    """Earlier turns as a transcript block (empty when there are none)"""
+    block = ""
+    if summary:
+        block += f"\nSummary of the earlier conversation:\n{summary}\n"
+    if history:
+        block += "\nConversation so far:\n" + format_transcript(history) + "\n"
+    return block
+
+
+def build_summary_payload(summary: str, turns: List[Dict[str, str]], max_output_tokens: int = 250) -> Dict[str, Any]:
+    """Build the request body that folds older turns into the running summary"""
+    prompt = f"""Update the running summary of a patient's conversation with HealthGuard AI.
+
+Current summary:
+{summary or '(none yet)'}
+
+New turns to fold in:
+{format_transcript(turns)}
+
+Write one compact paragraph that keeps symptoms, timelines, medications,
+concerns, emotional state and anything already advised or agreed. Drop
+greetings and repetition. Reply with the summary only."""
+
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.2,
+            "maxOutputTokens": max_output_tokens,
+        }
+    }
+
+
+def get_mock_summary(summary: str, turns: List[Dict[str, str]], max_chars: int = 1000) -> str:
+    """Extractive fallback summary: what the patient said, most recent kept when trimming"""
+    said = [turn["content"][:160] for turn in turns if turn["role"] == "user"]
+    combined = " ".join(filter(None, [summary, "Patient said: " + " | ".join(said) if said else ""]))
+    return combined[-max_chars:]
+
+
+# Answer format for analyze_medical_text, sent as Gemini's responseSchema so
+# the model returns JSON in this shape; bump the version when it changes so
+# cached analyses in the old shape are not served
+ANALYSIS_SCHEMA_VERSION = 1
+URGENCY_LEVELS = ["low", "medium", "high", "emergency"]
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": {"type": "STRING", "description": "Two or three sentences a patient can understand"},
+        "symptoms": {"type": "ARRAY", "items": {"type": "STRING"}, "description": "Symptoms mentioned in the text"},
+        "possible_conditions": {"type": "ARRAY", "items": {"type": "STRING"},
+                                "description": "Conditions worth discussing with a clinician - suggestions, not a diagnosis"},
+        "urgency": {"type": "STRING", "enum": URGENCY_LEVELS},
+        "recommendations": {"type": "ARRAY", "items": {"type": "STRING"}, "description": "Recommended next steps"},
+        "red_flags": {"type": "ARRAY", "items": {"type": "STRING"},
+                      "description": "Findings that need immediate care, empty if none"},
+    },
+    "required": ["summary", "symptoms", "possible_conditions", "urgency", "recommendations", "red_flags"],
+    "propertyOrdering": ["summary", "symptoms", "possible_conditions", "urgency", "recommendations", "red_flags"],
+}
+
+
+def build_analysis_payload(text: str) -> Dict[str, Any]:
+    """Build the generateContent request body for a medical text analysis (JSON answer, see ANALYSIS_SCHEMA)"""
+    prompt = f"""Analyze this medical text:
+
+{text}
+
+Reply with JSON only, with these fields:
+- summary: two or three plain-language sentences
+- symptoms: symptoms identified
+- possible_conditions: possible conditions (suggest only, don't diagnose)
+- urgency: one of {", ".join(URGENCY_LEVELS)}
+- recommendations: recommended next steps
+- red_flags: anything that needs immediate care (empty if none)"""
+
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.2,
+            "responseMimeType": "application/json",
+            "responseSchema": ANALYSIS_SCHEMA,
+        }
+    }
+
+
+def build_merge_payload(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the request body that merges per-section analyses of one document into one (same schema)"""
+    prompt = f"""Merge these analyses of consecutive sections of one medical document into a single analysis of the whole document.
+
+Sections overlap slightly, so the same finding can appear in more than one.
+Combine duplicates and near-duplicates into one entry, keep every distinct
+finding, keep every red flag, and use the highest urgency any section
+reported. Write the summary for the whole document, not per section. Do not
+add findings that no section reported.
+
+Section analyses (JSON):
+{json.dumps(sections, indent=1)}
+
+Reply with JSON only, in the same fields."""
+
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.0,
+            "responseMimeType": "application/json",
+            "responseSchema": ANALYSIS_SCHEMA,
+        }
+    }
+
+
+RULE_RESPONSES = {
+    "greeting": "Hello! 👋 I'm HealthGuard AI. How can I help with your health today? "
+                "I can help with symptoms, appointments, medications and lab results.",
+    "thanks": "You're welcome! 😊 Is there anything else I can help you with?",
+    "acknowledgement": "Great! Let me know if you have any other questions or if there's anything else I can help with.",
+    "goodbye": "Take care! 💙 If anything changes or you have more questions, I'm here any time.",
+}
+
+
+def get_rule_response(kind: str) -> Dict[str, Any]:
+    """Rule engine answer for small talk ("greeting", "thanks", ...) - no LLM call"""
+    return {
+        "content": RULE_RESPONSES[kind],
+        "sources": ["HealthGuard AI"],
+        "confidence": 1.0,
+        "model_used": "HealthGuard Rules",
+        "is_mock": False
+    }
+
+
+def get_mock_analysis(text: str, is_fallback: bool = False) -> Dict[str, Any]:
+    """Mock medical analysis"""
+    fields = mock_analysis_fields(text)
+    return {
+        **fields,
+        "analysis": f"{fields['summary']}\n\nIn mock mode. Real analysis available with full Gemini API.",
+        "is_mock": True,
+        "note": "Add valid API key for real AI analysis" if not is_fallback else "API temporarily unavailable"
+    }
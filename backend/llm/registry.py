@@ -0,0 +1,55 @@
+import os
+import importlib
+from typing import Dict, Callable, Optional, List
+
+from llm.base import LLMBackend
+
+# Built-in backends, imported lazily so e.g. the REST backend never needs the SDK installed
+_BUILTIN_BACKENDS = {
+    "rest": ("llm.rest_backend", "RestGeminiBackend"),
+    "sdk": ("llm.sdk_backend", "SDKGeminiBackend"),
+    "mock": ("llm.mock_backend", "MockBackend"),
+    "local": ("llm.local_backend", "LocalStandInBackend"),
+    # Recorded calls from LLM_CASSETTE, no network (see llm/cassette.py)
+    "replay": ("llm.cassette", "CassetteReplayBackend"),
+}
+
+_custom_backends: Dict[str, Callable[[], LLMBackend]] = {}
+
+
+def register_backend(name: str, factory: Callable[[], LLMBackend]):
+    """Make an additional backend selectable through LLM_BACKEND"""
+    _custom_backends[name] = factory
+
+
+def available_backends() -> List[str]:
+    return sorted(set(_BUILTIN_BACKENDS) | set(_custom_backends))
+
+
+def default_backend_name() -> str:
+    """LLM_BACKEND if set; otherwise mock for MOCK_MODE or no key at all, else rest"""
+    configured = os.getenv("LLM_BACKEND")
+    if configured:
+        return configured.lower()
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS")
+    if os.getenv("MOCK_MODE", "false").lower() == "true" or not api_key or api_key == "YOUR_REAL_API_KEY_HERE":
+        return "mock"
+    return "rest"
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """The named backend (LLM_BACKEND by default), recording to LLM_CASSETTE_RECORD when set"""
+    name = name or default_backend_name()
+    if name in _custom_backends:
+        backend = _custom_backends[name]()
+    elif name not in _BUILTIN_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}' (available: {', '.join(available_backends())})")
+    else:
+        module_name, class_name = _BUILTIN_BACKENDS[name]
+        backend = getattr(importlib.import_module(module_name), class_name)()
+
+    record_path = os.getenv("LLM_CASSETTE_RECORD")
+    if record_path and name != "replay":
+        from llm.cassette import CassetteRecorder
+        backend = CassetteRecorder(backend, record_path)
+    return backend
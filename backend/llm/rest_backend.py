@@ -0,0 +1,231 @@
+import os
+import json
+import asyncio
+from typing import Dict, Any, Optional, AsyncIterator
+
+import httpx
+
+from llm.base import LLMBackend, BackendError, BackendTimeout, KeyPoolExhausted
+from utils.http_transport import gemini_transport
+from utils.key_pool import ApiKeyPool, gemini_key_pool, retry_delay_seconds
+from llm.context_cache import ContextCacheManager, gemini_context_cache, is_stale_cache_error
+from utils.startup import retry_warm_up
+from utils import deadline
+
+
+def extract_text(result: Dict[str, Any]) -> str:
+    """Concatenated text of the first candidate in a generateContent response"""
+    candidates = result.get('candidates') or []
+    if not candidates:
+        return ""
+    parts = candidates[0].get('content', {}).get('parts') or []
+    return "".join(part.get('text', '') for part in parts)
+
+
+def extract_usage(result: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Token usage; prompt_tokens counts only what was sent this call, cached_tokens what the context cache served"""
+    usage = result.get('usageMetadata') or {}
+    prompt_tokens = usage.get('promptTokenCount')
+    cached_tokens = usage.get('cachedContentTokenCount')
+    if prompt_tokens is not None and cached_tokens:
+        prompt_tokens -= cached_tokens
+    return {
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": usage.get('candidatesTokenCount'),
+        "cached_tokens": cached_tokens,
+    }
+
+
+def estimate_request_tokens(payload: Dict[str, Any]) -> int:
+    """Tokens a request may use against the TPM quota before Gemini reports the real count (~4 chars/token)"""
+    prompt_tokens = len(json.dumps([payload.get('systemInstruction'), payload.get('contents', [])])) // 4
+    output_tokens = (payload.get('generationConfig') or {}).get('maxOutputTokens') or 0
+    return prompt_tokens + output_tokens
+
+
+class RestGeminiBackend(LLMBackend):
+    """Gemini over the REST API on the shared keep-alive connection pool
+
+    Requests are spread over the API key pool (GEMINI_API_KEYS); a 429 on
+    one key is retried straight away on another key with room left. Long
+    system instructions are served from Gemini's context cache.
+    """
+
+    name = "rest"
+
+    def __init__(self, key_pool: ApiKeyPool = gemini_key_pool, context_cache: ContextCacheManager = gemini_context_cache):
+        super().__init__()
+        self.key_pool = key_pool
+        self.context_cache = context_cache
+        self.api_key = key_pool.primary
+        # Use the latest flash model (fast and efficient)
+        self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        self.api_version = os.getenv("GEMINI_API_VERSION", "v1beta")
+        print(f"✅ REST backend: {self.model_name} ({self.api_version})")
+
+    @property
+    def display_name(self) -> str:
+        return self.model_display_name()
+
+    def model_display_name(self, model: Optional[str] = None) -> str:
+        # "gemini-2.5-flash" -> "Gemini 2.5 Flash"
+        return " ".join(word.capitalize() for word in (model or self.model_name).split("-"))
+
+    @property
+    def source_name(self) -> str:
+        return f"Google {self.display_name}"
+
+    def _path(self, method: str, model: Optional[str] = None) -> str:
+        return f"/{self.api_version}/models/{model or self.model_name}:{method}"
+
+    async def warm_up(self):
+        """Confirm the model is served and open a pooled connection before the first chat"""
+        if self.ready:
+            return
+
+        async def attempt():
+            try:
+                response = await gemini_transport.get(
+                    f"/{self.api_version}/models/{self.model_name}",
+                    params={"key": self.api_key}
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"model check returned {response.status_code}")
+            except Exception as e:
+                self.last_error = str(e)[:200]
+                raise
+
+        if await retry_warm_up("Gemini REST backend", attempt):
+            self.ready = True
+            self.last_error = None
+            print(f"🎉 {self.model_name} is available - REST backend ready")
+
+    async def _lease(self, payload: Dict[str, Any], tried: list, timeout: Optional[float] = None):
+        """Check out a key for one request, skipping keys that already answered 429
+
+        Waits no longer than the call's timeout or the request's deadline.
+        """
+        lease = await self.key_pool.acquire(estimate_request_tokens(payload), timeout=deadline.budget(timeout), exclude=tried)
+        if lease is None:
+            if tried:
+                # Gemini did throttle us, on every key we could try
+                raise BackendError("All Gemini API keys are throttled", 429)
+            raise KeyPoolExhausted("All Gemini API keys are over quota")
+        tried.append(lease.key)
+        return lease
+
+    def _retry_on_another_key(self, lease, body: str, tried: list) -> bool:
+        """Rest a throttled key; True if another key is left to try"""
+        self.key_pool.release(lease, 429, retry_after=retry_delay_seconds(body))
+        return len(tried) < len(self.key_pool)
+
+    async def _post(self, lease, payload: Dict[str, Any], model: Optional[str], timeout: Optional[float]):
+        """generateContent with one key, naming the context cache when there is one"""
+        body, handle = self.context_cache.apply(payload, model or self.model_name, lease.key)
+        try:
+            response = await gemini_transport.post(
+                self._path("generateContent", model),
+                params={"key": lease.value},
+                json=body,
+                timeout=timeout
+            )
+            if handle is not None and is_stale_cache_error(response.status_code, response.text):
+                # The cache is gone on Gemini's side; the inline request still works
+                self.context_cache.invalidate(handle)
+                response = await gemini_transport.post(
+                    self._path("generateContent", model),
+                    params={"key": lease.value},
+                    json=payload,
+                    timeout=timeout
+                )
+        except httpx.TimeoutException as e:
+            self.key_pool.release(lease)
+            raise BackendTimeout(f"Gemini timeout: {e!r}")
+        except httpx.HTTPError as e:
+            self.key_pool.release(lease)
+            raise BackendError(f"Gemini transport error: {e!r}")
+        except asyncio.CancelledError:
+            self.key_pool.release(lease)
+            raise
+        return response
+
+    def _release(self, lease, status_code: Optional[int], usage: Dict[str, Optional[int]]):
+        """Give the key back; cached tokens still count against its TPM quota"""
+        self.context_cache.record_usage(usage.get("cached_tokens"))
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is not None:
+            prompt_tokens += usage.get("cached_tokens") or 0
+        self.key_pool.release(lease, status_code, prompt_tokens, usage.get("output_tokens"))
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        tried = []
+        while True:
+            lease = await self._lease(payload, tried, timeout)
+            response = await self._post(lease, payload, model, timeout)
+            if response.status_code != 429 or not self._retry_on_another_key(lease, response.text, tried):
+                break
+
+        if response.status_code != 200:
+            self.key_pool.release(lease, response.status_code)
+            raise BackendError(f"Gemini API error {response.status_code}: {response.text[:200]}", response.status_code)
+
+        result = response.json()
+        usage = extract_usage(result)
+        self._release(lease, 200, usage)
+        text = extract_text(result)
+        if not text:
+            raise BackendError("No candidates in response", response.status_code)
+        return {"text": text, **usage}
+
+    async def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                     model: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """streamGenerateContent over SSE; the last chunk carries token usage when Gemini sends it"""
+        tried = []
+        lease = await self._lease(payload, tried, timeout)
+        use_cache = True
+        usage = {}
+        status_code = None
+        try:
+            while True:
+                body, handle = self.context_cache.apply(payload, model or self.model_name, lease.key) if use_cache else (payload, None)
+                async with gemini_transport.stream(
+                    self._path("streamGenerateContent", model),
+                    params={"key": lease.value, "alt": "sse"},
+                    json=body,
+                    timeout=timeout
+                ) as response:
+                    status_code = response.status_code
+                    if response.status_code != 200:
+                        error_body = (await response.aread()).decode(errors="replace")
+                        # Nothing has reached the caller yet, so the request can still be resent
+                        if handle is not None and is_stale_cache_error(response.status_code, error_body):
+                            self.context_cache.invalidate(handle)
+                            use_cache = False
+                            continue
+                        if response.status_code == 429 and self._retry_on_another_key(lease, error_body, tried):
+                            lease = await self._lease(payload, tried, timeout)
+                            continue
+                        raise BackendError(f"Gemini stream error {response.status_code}: {error_body[:200]!r}", response.status_code)
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        result = json.loads(line[5:])
+                        text = extract_text(result)
+                        chunk_usage = extract_usage(result)
+                        if chunk_usage["output_tokens"] is not None:
+                            usage = chunk_usage
+                        if text or chunk_usage["output_tokens"] is not None:
+                            yield {"text": text, **chunk_usage}
+                return
+        except httpx.TimeoutException as e:
+            raise BackendTimeout(f"Gemini stream timeout: {e!r}")
+        except httpx.HTTPError as e:
+            raise BackendError(f"Gemini stream transport error: {e!r}")
+        finally:
+            self._release(lease, status_code, usage)
+
+    async def aclose(self):
+        await self.context_cache.stop()
+        await gemini_transport.aclose()
@@ -0,0 +1,146 @@
+import os
+from typing import Dict, Any, Optional
+
+from llm.instrumentation import BackendInstrumentation
+from utils.hedging import HedgePolicy, hedge_policy
+from utils.intent_matcher import match_intents
+from utils.response_cache import normalize_message
+
+# Whole messages the rule engine answers without an LLM call (after normalize_message)
+TRIVIAL_MESSAGES = {
+    **dict.fromkeys([
+        "hi", "hello", "hey", "hi there", "hello there", "hey there", "greetings", "howdy",
+        "good morning", "good afternoon", "good evening",
+    ], "greeting"),
+    **dict.fromkeys([
+        "thanks", "thank you", "thanks a lot", "thank you so much", "thanks so much", "thx", "ty",
+        "much appreciated", "appreciate it", "i appreciate it",
+    ], "thanks"),
+    **dict.fromkeys([
+        "ok", "okay", "k", "got it", "cool", "great", "sounds good", "alright", "sure", "perfect", "nice",
+    ], "acknowledgement"),
+    **dict.fromkeys([
+        "bye", "goodbye", "bye bye", "see you", "see you later", "good night", "take care",
+    ], "goodbye"),
+}
+
+
+def awaits_reply(context: Optional[Dict[str, Any]]) -> bool:
+    """True when the assistant's last turn ended by asking the patient something
+
+    "sure" or "ok" after "Would you like me to book an appointment?" is an
+    answer to that question, not small talk.
+    """
+    history = (context or {}).get("history") or []
+    last = next((turn["content"] for turn in reversed(history) if turn.get("role") == "assistant"), "")
+    return "?" in last.rstrip().rsplit("\n\n", 1)[-1]
+
+
+class RouteProfile:
+    """Model and budgets for one class of message
+
+    model None means the backend's own model. Each profile has its own
+    hedge policy, so its latency budget (and hedge delay) is measured
+    against calls of its own kind only.
+    """
+
+    def __init__(self, name: str, model: Optional[str], max_output_tokens: int,
+                 latency_budget_seconds: Optional[float] = None, temperature: float = 0.7,
+                 hedge: Optional[HedgePolicy] = None):
+        self.name = name
+        self.model = model
+        self.max_output_tokens = max_output_tokens
+        self.temperature = temperature
+        self.hedge = hedge or HedgePolicy(budget_seconds=latency_budget_seconds)
+
+    @property
+    def latency_budget_seconds(self) -> float:
+        return self.hedge.budget_seconds
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_output_tokens": self.max_output_tokens,
+            "latency_budget_seconds": self.latency_budget_seconds,
+            "temperature": self.temperature,
+        }
+
+
+class ModelRouter:
+    """Picks the route for each message before it reaches the LLM
+
+    - "rules": greetings, thanks and other trivial messages, answered by
+      the local rule engine with no LLM call - unless they reply to a
+      question the assistant just asked
+    - "fast": short questions, on a small model with a tight budget
+    - "heavy": long messages and clinical questions (lab results,
+      dosages, imaging...), on a larger model with room to answer fully
+
+    With routing off everything takes the "default" route: the backend's
+    own model with the original generation settings.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, short_message_chars: Optional[int] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("MODEL_ROUTING", "true").lower() == "true"
+        self.short_message_chars = short_message_chars or int(os.getenv("ROUTE_SHORT_MESSAGE_CHARS", "280"))
+
+        self.default = RouteProfile("default", None, 800, hedge=hedge_policy)
+        self.profiles: Dict[str, RouteProfile] = {
+            "fast": RouteProfile(
+                "fast",
+                os.getenv("ROUTE_FAST_MODEL", "gemini-2.5-flash-lite"),
+                int(os.getenv("ROUTE_FAST_MAX_TOKENS", "400")),
+                float(os.getenv("ROUTE_FAST_BUDGET", "8")),
+            ),
+            "heavy": RouteProfile(
+                "heavy",
+                os.getenv("ROUTE_HEAVY_MODEL", "gemini-2.5-pro"),
+                int(os.getenv("ROUTE_HEAVY_MAX_TOKENS", "2048")),
+                float(os.getenv("ROUTE_HEAVY_BUDGET", "45")),
+                temperature=0.4,
+            ),
+        }
+        # Latency, token and error accounting per route
+        self.instrumentation = BackendInstrumentation()
+        self.routed = {name: 0 for name in ["rules", "fast", "heavy", "default"]}
+
+    def trivial_kind(self, message: str) -> Optional[str]:
+        """"greeting", "thanks", ... when the whole message is small talk, else None"""
+        return TRIVIAL_MESSAGES.get(normalize_message(message))
+
+    def route(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """Route name for a chat message, in the conversation its context carries"""
+        if not self.enabled:
+            name = "default"
+        elif self.trivial_kind(message) and not awaits_reply(context):
+            name = "rules"
+        elif len(message) > self.short_message_chars or "route.clinical" in match_intents(message):
+            name = "heavy"
+        else:
+            name = "fast"
+        self.routed[name] += 1
+        return name
+
+    def profile(self, name: str) -> RouteProfile:
+        """Profile for an LLM route (the default one when routing is off)"""
+        if not self.enabled:
+            return self.default
+        return self.profiles.get(name, self.default)
+
+    def get_stats(self) -> Dict[str, Any]:
+        latency = self.instrumentation.get_stats()
+        profiles = {"default": self.default, **self.profiles} if self.enabled else {"default": self.default}
+        return {
+            "enabled": self.enabled,
+            "routed": dict(self.routed),
+            "short_message_chars": self.short_message_chars,
+            "routes": {
+                name: {**profile.get_config(), **latency.get(name, {}), "hedging": profile.hedge.get_stats()}
+                for name, profile in profiles.items()
+            },
+            "rules": latency.get("rules", {}),
+        }
+
+
+# Shared router for the LLM client
+model_router = ModelRouter()
@@ -0,0 +1,110 @@
+import os
+import asyncio
+from typing import Dict, Any, Optional
+
+import google.generativeai as genai
+
+from llm.base import LLMBackend, BackendError, BackendTimeout
+from utils.canned_answers import payload_text
+from utils.startup import retry_warm_up
+
+# Preferred models, first available wins
+PREFERRED_MODELS = [
+    'models/gemini-1.5-flash',
+    'models/gemini-1.5-flash-latest',
+    'models/gemini-1.5-pro',
+    'models/gemini-pro',
+]
+
+
+class SDKGeminiBackend(LLMBackend):
+    """Gemini through the google-generativeai SDK (blocking calls run in worker threads)"""
+
+    name = "sdk"
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        self.model = None
+        # Configure the API (local only, no network)
+        genai.configure(api_key=self.api_key)
+        print("✅ SDK backend: model discovery deferred to warm-up")
+
+    @property
+    def display_name(self) -> str:
+        return f"Gemini SDK ({(self.model_name or 'discovering').replace('models/', '')})"
+
+    @property
+    def source_name(self) -> str:
+        return f"Google {self.display_name}"
+
+    def _discover_model(self):
+        """Blocking model discovery and test call - run off the event loop"""
+        print("📋 Checking available models...")
+        gemini_models = [m.name for m in genai.list_models() if 'gemini' in m.name.lower()]
+        print(f"Found Gemini models: {gemini_models[:5]}...")
+        if not gemini_models:
+            raise RuntimeError("No Gemini models found")
+
+        model_name = next((name for name in PREFERRED_MODELS if name in gemini_models), gemini_models[0])
+        print(f"🎯 Selected model: {model_name}")
+        model = genai.GenerativeModel(model_name)
+
+        print("🧪 Testing connection...")
+        test_response = model.generate_content("Hello")
+        print(f"✅ Connection successful! Test response: '{test_response.text[:50]}...'")
+
+        self.model = model
+        self.model_name = model_name
+
+    async def warm_up(self):
+        """Discover a model in the background, retrying until the network cooperates"""
+        if self.ready:
+            return
+
+        async def attempt():
+            try:
+                await asyncio.to_thread(self._discover_model)
+            except Exception as e:
+                self.last_error = str(e)[:200]
+                raise
+
+        if await retry_warm_up("Gemini SDK backend", attempt):
+            self.ready = True
+            self.last_error = None
+            print(f"🎉 SDK backend ready with {self.model_name}")
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       model: Optional[str] = None) -> Dict[str, Any]:
+        # Always the discovered model; per-call overrides are a REST backend feature
+        if self.model is None:
+            raise BackendError("SDK model not discovered yet", 503)
+
+        config = payload.get("generationConfig") or {}
+        generation_config = {
+            key: value for key, value in {
+                "temperature": config.get("temperature"),
+                "max_output_tokens": config.get("maxOutputTokens"),
+                # The schema itself is REST-only; the prompt spells out the fields
+                "response_mime_type": config.get("responseMimeType"),
+            }.items() if value is not None
+        }
+
+        try:
+            response = await asyncio.wait_for(
+                asyncio.to_thread(self.model.generate_content, payload_text(payload), generation_config=generation_config),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise BackendTimeout(f"Gemini SDK timeout after {timeout}s")
+        except Exception as e:
+            # google.api_core exceptions carry the HTTP status in .code
+            code = getattr(e, "code", None)
+            raise BackendError(f"Gemini SDK error: {e}", code if isinstance(code, int) else None)
+
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "text": response.text,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "output_tokens": getattr(usage, "candidates_token_count", None),
+        }
@@ -0,0 +1,192 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+from llm import llm_client
+from utils.llm_scheduler import llm_scheduler
+from utils.response_cache import normalize_message
+from utils.deadline import no_deadline
+
+
+class Speculation:
+    """A pre-generated answer for one quick reply (the task until it finishes)"""
+
+    __slots__ = ("task", "result", "expires")
+
+    def __init__(self, task: asyncio.Task, expires: float):
+        self.task = task
+        self.result: Optional[Dict[str, Any]] = None
+        self.expires = expires
+
+
+class QuickReplySpeculator:
+    """Answers the quick replies a conversation was just offered, before anyone taps them
+
+    After a chat turn, each returned quick reply is generated in the
+    background at speculative priority - below batch work, only while the
+    LLM queue is empty and with at most max_inflight calls at once, so real
+    traffic never waits on a guess. Answers are kept per conversation for a
+    short TTL; a tap on a quick reply takes its answer instead of making a
+    new LLM call. The next turn of the conversation discards whatever was
+    left unused.
+    """
+
+    def __init__(self, client=llm_client, scheduler=llm_scheduler, enabled: Optional[bool] = None,
+                 ttl_seconds: Optional[float] = None, max_inflight: Optional[int] = None,
+                 max_conversations: Optional[int] = None):
+        self.client = client
+        self.scheduler = scheduler
+        self.enabled = enabled if enabled is not None else os.getenv("SPECULATIVE_REPLIES", "false").lower() == "true"
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SPECULATIVE_TTL", "120"))
+        self.max_inflight = max_inflight or int(os.getenv("SPECULATIVE_MAX_INFLIGHT", "2"))
+        self.max_conversations = max_conversations or int(os.getenv("SPECULATIVE_MAX_CONVERSATIONS", "2000"))
+
+        # conversation_id -> {normalized quick reply: Speculation}
+        self._conversations: "OrderedDict[str, Dict[str, Speculation]]" = OrderedDict()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self.stats = {
+            "launched": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped_busy": 0,
+            "hits": 0,
+            "misses": 0,
+            "misses_in_flight": 0,
+            "wasted": 0,
+            "hit_time_saved_seconds": 0.0,
+        }
+        self._generation_times: List[float] = []
+
+    def speculate(self, conversation_id: Optional[str], replies: List[str], context: Dict[str, Any]):
+        """Start pre-generating answers for the quick replies just offered to a conversation
+
+        context is the LLM context a tapped reply would be sent with.
+        """
+        if not self.enabled or not conversation_id:
+            return
+        self.discard(conversation_id)
+
+        # Speculation only uses spare capacity
+        if sum(self.scheduler.queue_depth().values()) > 0:
+            self.stats["skipped_busy"] += 1
+            return
+
+        expires = time.monotonic() + self.ttl_seconds
+        speculations = {}
+        for reply in replies:
+            key = normalize_message(reply)
+            if not key or key in speculations:
+                continue
+            task = asyncio.create_task(self._generate(reply, context))
+            speculation = speculations[key] = Speculation(task, expires)
+            task.add_done_callback(lambda t, s=speculation: self._finished(s, t))
+            self.stats["launched"] += 1
+        self._conversations[conversation_id] = speculations
+
+        while len(self._conversations) > self.max_conversations:
+            self._drop(next(iter(self._conversations)))
+
+    async def _generate(self, reply: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._inflight:
+            start_time = time.monotonic()
+            # Not bound by the deadline of the request that offered the replies
+            with no_deadline():
+                result = await self.client.generate_response(message=reply, context=context, priority="speculative")
+            self._generation_times = (self._generation_times + [time.monotonic() - start_time])[-200:]
+            return result
+
+    def _finished(self, speculation: Speculation, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats["failed"] += 1
+            print(f"❌ Quick reply speculation failed: {task.exception()!r}")
+            return
+        result = task.result()
+        # Fallback answers are not worth serving ahead of a real call
+        if result.get("is_mock") and not self.client.mock_mode:
+            self.stats["failed"] += 1
+            return
+        speculation.result = result
+        self.stats["completed"] += 1
+
+    def take(self, conversation_id: Optional[str], message: str) -> Optional[Dict[str, Any]]:
+        """The pre-generated answer if message is a quick reply this conversation was offered
+
+        None for other messages and for quick replies whose answer is not
+        ready (or has expired); those go to the LLM as usual. Either way the
+        conversation has moved on, so the other answers are dropped.
+        """
+        speculations = self._conversations.pop(conversation_id, None) if conversation_id else None
+        if not speculations:
+            return None
+        speculation = speculations.pop(normalize_message(message), None)
+        for leftover in speculations.values():
+            leftover.task.cancel()
+            self._count_waste(leftover)
+        if speculation is None:
+            return None
+
+        if speculation.result is not None and speculation.expires > time.monotonic():
+            self.stats["hits"] += 1
+            times = self._generation_times
+            if times:
+                self.stats["hit_time_saved_seconds"] += sum(times) / len(times)
+            print(f"🔮 Speculative quick reply hit for {conversation_id}")
+            return {**speculation.result, "speculative": True}
+
+        self.stats["misses"] += 1
+        if not speculation.task.done():
+            # The real call is about to start; don't pay for the guess as well
+            self.stats["misses_in_flight"] += 1
+            speculation.task.cancel()
+        else:
+            self._count_waste(speculation)
+        return None
+
+    def discard(self, conversation_id: Optional[str]):
+        """Drop a conversation's unused speculation (its next turn has started)"""
+        if conversation_id in self._conversations:
+            self._drop(conversation_id)
+
+    def _drop(self, conversation_id: str):
+        for speculation in self._conversations.pop(conversation_id).values():
+            speculation.task.cancel()
+            self._count_waste(speculation)
+
+    def _count_waste(self, speculation: Speculation):
+        if speculation.result is not None:
+            self.stats["wasted"] += 1
+
+    async def stop(self):
+        """Cancel outstanding speculation (shutdown)"""
+        tasks = [s.task for speculations in self._conversations.values() for s in speculations.values()]
+        self._conversations.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        taps = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_time_saved_seconds": round(self.stats["hit_time_saved_seconds"], 2),
+            "enabled": self.enabled,
+            # Share of quick reply taps served from speculation
+            "hit_rate": round(self.stats["hits"] / taps, 3) if taps else 0.0,
+            # Share of generated answers nobody used
+            "waste_rate": round(self.stats["wasted"] / self.stats["completed"], 3) if self.stats["completed"] else 0.0,
+            "conversations": len(self._conversations),
+            "config": {
+                "ttl_seconds": self.ttl_seconds,
+                "max_inflight": self.max_inflight,
+                "max_conversations": self.max_conversations,
+            },
+        }
+
+
+# Shared speculator for the chat endpoints
+quick_reply_speculator = QuickReplySpeculator()
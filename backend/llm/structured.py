@@ -0,0 +1,58 @@
+import re
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# Checks model output against the subset of OpenAPI schema Gemini takes as
+# generationConfig.responseSchema (type, properties, required, items, enum)
+
+_PYTHON_TYPES = {
+    "OBJECT": dict,
+    "ARRAY": list,
+    "STRING": str,
+    "NUMBER": (int, float),
+    "INTEGER": int,
+    "BOOLEAN": bool,
+}
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Everything wrong with `value` under `schema`, as readable messages (empty = valid)"""
+    kind = schema.get("type", "").upper()
+    expected = _PYTHON_TYPES.get(kind)
+    # bool is an int in Python, but not a NUMBER or INTEGER in JSON
+    if expected and (not isinstance(value, expected) or (kind in ("NUMBER", "INTEGER") and isinstance(value, bool))):
+        return [f"{path}: expected {kind.lower()}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} is not one of {', '.join(schema['enum'])}"]
+
+    errors = []
+    if kind == "OBJECT":
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name}: missing")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in value:
+                errors.extend(validate_schema(value[name], subschema, f"{path}.{name}"))
+    elif kind == "ARRAY" and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(validate_schema(item, schema["items"], f"{path}[{index}]"))
+    return errors
+
+
+def parse_structured(text: str, schema: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """(value, errors) for a JSON answer; value is None unless it matched the schema
+
+    Tolerates a ```json fence (backends that only honour the prompt) and
+    drops properties the schema does not know.
+    """
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text or "")
+    try:
+        value = json.loads(text)
+    except ValueError as e:
+        return None, [f"$: not JSON ({e})"]
+    errors = validate_schema(value, schema)
+    if errors:
+        return None, errors
+    if isinstance(value, dict) and "properties" in schema:
+        value = {name: item for name, item in value.items() if name in schema["properties"]}
+    return value, []
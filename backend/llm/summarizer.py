@@ -0,0 +1,108 @@
+import os
+import asyncio
+from typing import Dict, Any, Optional, Set
+
+from llm import llm_client
+from llm.prompts import format_transcript
+from utils.canned_answers import estimate_tokens
+from utils.conversation_store import conversation_store
+from utils.deadline import no_deadline
+
+
+class ConversationSummarizer:
+    """Rolling summary of older turns so long chats keep a roughly constant prompt size
+
+    Once a conversation holds more than trigger_turns turns, everything but
+    the newest keep_turns is folded into its running summary. This runs as a
+    background task after the response has gone out, at batch priority, so it
+    never adds latency to the turn that triggered it.
+    """
+
+    def __init__(self, store=conversation_store, client=llm_client, enabled: Optional[bool] = None,
+                 trigger_turns: Optional[int] = None, keep_turns: Optional[int] = None,
+                 max_summary_tokens: Optional[int] = None):
+        self.store = store
+        self.client = client
+        self.enabled = enabled if enabled is not None else os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+        self.trigger_turns = trigger_turns or int(os.getenv("SUMMARY_TRIGGER_TURNS", "8"))
+        self.keep_turns = keep_turns or int(os.getenv("SUMMARY_KEEP_TURNS", "4"))
+        self.max_summary_tokens = max_summary_tokens or int(os.getenv("SUMMARY_MAX_TOKENS", "250"))
+
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            "runs": 0,
+            "failures": 0,
+            "turns_folded": 0,
+            "prompts_with_summary": 0,
+            "prompt_tokens_saved": 0,
+        }
+
+    def prompt_context(self, conversation_id: Optional[str], count: bool = True) -> Dict[str, Any]:
+        """{"summary", "history"} to put in a chat context, counting the tokens the summary saves
+
+        count=False for prompts that may never be sent (speculative drafts),
+        so the savings reported are only those of real turns.
+        """
+        history = self.store.get_history(conversation_id)
+        summary = self.store.get_summary(conversation_id)
+        if summary["summary"] and count:
+            self.stats["prompts_with_summary"] += 1
+            self.stats["prompt_tokens_saved"] += max(
+                0, summary["summarized_tokens"] - estimate_tokens(summary["summary"])
+            )
+        return {"summary": summary["summary"], "history": history}
+
+    def maybe_schedule(self, conversation_id: Optional[str]):
+        """Start a background fold if the conversation has grown past the trigger"""
+        if not self.enabled or not conversation_id or conversation_id in self._pending:
+            return
+        if len(self.store.get_history(conversation_id)) <= self.trigger_turns:
+            return
+        self._pending.add(conversation_id)
+        task = asyncio.create_task(self._summarize(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, conversation_id: str):
+        try:
+            turns = self.store.get_history(conversation_id)[:-self.keep_turns]
+            if not turns:
+                return
+            previous = self.store.get_summary(conversation_id)["summary"]
+            self.stats["runs"] += 1
+            # Runs after the response has gone out; the request's deadline no longer applies
+            with no_deadline():
+                summary = await self.client.summarize_conversation(previous, turns, self.max_summary_tokens)
+            self.store.fold(conversation_id, turns, summary, estimate_tokens(format_transcript(turns)))
+            self.stats["turns_folded"] += len(turns)
+            print(f"🧾 Summarized {len(turns)} turns of {conversation_id} "
+                  f"({estimate_tokens(summary)} summary tokens)")
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"❌ Conversation summary failed for {conversation_id}: {e!r}")
+        finally:
+            self._pending.discard(conversation_id)
+
+    async def stop(self):
+        """Cancel outstanding summaries (shutdown)"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "config": {
+                "trigger_turns": self.trigger_turns,
+                "keep_turns": self.keep_turns,
+                "max_summary_tokens": self.max_summary_tokens,
+            },
+        }
+
+
+# Shared summarizer for the chat endpoints
+conversation_summarizer = ConversationSummarizer()
@@ -25,6 +25,11 @@ from api.crm import router as crm_router
 from api.workflows import router as workflows_router
 from api.patients import router as patients_router
 from api.metrics import router as metrics_router
+from utils.startup import startup_registry
+from utils.deadline import DeadlineMiddleware
+from llm import llm_client
+from llm.summarizer import conversation_summarizer
+from llm.speculator import quick_reply_speculator
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -41,9 +46,17 @@ async def lifespan(app: FastAPI):
         print("✨ Real AI mode - Gemini API active (NO TOKEN LIMITS)")
     print("="*60 + "\n")
     
+    # Model discovery and warm-up happen in the background; /ready reports progress
+    startup_registry.register("llm", llm_client)
+    startup_registry.start()
+    
     yield
     # Shutdown
     print("👋 HealthGuard AI Backend Shutting Down...")
+    await startup_registry.stop()
+    await conversation_summarizer.stop()
+    await quick_reply_speculator.stop()
+    await llm_client.aclose()
 
 # Create FastAPI app - THIS IS WHAT UVICORN NEEDS
 app = FastAPI(
@@ -77,6 +90,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Every HTTP request gets a deadline (per route, see utils/deadline.py) that upstream calls share
+app.add_middleware(DeadlineMiddleware)
+
 # ===== WEBHOOK REDIRECTS =====
 @app.api_route("/webhook/retell", methods=["GET", "POST", "PUT", "DELETE"])
 @app.api_route("/webhook/retell/", methods=["GET", "POST", "PUT", "DELETE"])
@@ -144,11 +160,16 @@ async def root():
         "token_limits": "DISABLED - Complete responses guaranteed",
         "endpoints": {
             "chat": "/api/chat",
+            "chat_stream": "/api/chat/stream",
+            "chat_batch": "/api/chat/batch",
+            "chat_ws": "/api/chat/ws",
+            "ready": "/ready",
             "webhooks": "/webhooks/retell",
             "crm": "/crm/leads",
             "workflows": "/workflows",
             "patients": "/patients",
             "metrics": "/metrics/live",
+            "llm_metrics": "/metrics/llm",
             "docs": "/docs"
         }
     }
@@ -169,6 +190,13 @@ async def health_check():
         }
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe - 503 until the real Gemini models have been reached"""
+    readiness = startup_registry.get_readiness()
+    readiness["timestamp"] = datetime.now().isoformat()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @app.get("/api/test")
 async def test_endpoint():
     return {
@@ -176,6 +204,9 @@ async def test_endpoint():
         "token_limits": "DISABLED - You will receive complete responses",
         "endpoints_available": [
             "POST /api/chat - AI chat endpoint (complete responses)",
+            "POST /api/chat/stream - AI chat as Server-Sent Events (token streaming)",
+            "POST /api/chat/batch - Many chat requests at once, NDJSON results as they finish",
+            "WS /api/chat/ws - Chat session WebSocket (token streaming)",
             "POST /webhooks/retell - Retell.ai voice webhook",
             "WS /webhooks/voice-relay - Voice WebSocket",
             "GET /crm/leads - CRM leads",
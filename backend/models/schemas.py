@@ -43,6 +43,13 @@ class ChatResponse(BaseModel):
     conversation_id: str
     quick_replies: Optional[List[str]] = None
     widget: Optional[str] = None  # calendar, intake-form, etc.
+    metadata: Optional[Dict[str, Any]] = None
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest]
+
+class AnalysisRequest(BaseModel):
+    text: str  # lab report, prescription or other medical document
 
 class WebhookRequest(BaseModel):
     call_id: Optional[str] = None
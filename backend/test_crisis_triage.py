@@ -0,0 +1,61 @@
+"""Crisis triage regression cases
+
+    python test_crisis_triage.py    (or: python -m pytest test_crisis_triage.py)
+
+A crisis keyword alone must not send a patient the safety message; the
+message also has to say the crisis is happening now.
+"""
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from utils.intent_matcher import crisis_category
+from utils.llm_scheduler import classify_priority
+
+# Mentions a crisis keyword, but nothing is happening right now
+NOT_CRISIS = [
+    "What dose of aspirin helps prevent a heart attack?",
+    "My dad had a stroke in 2015",
+    "Is heatstroke dangerous for kids?",
+    "side effects of my seizure medication",
+    "Can you explain what a panic attack is?",
+    "how to avoid an overdose of tylenol",
+    "What are the warning signs of suicide in teenagers?",
+    "Does chest pain always mean a heart problem?",
+]
+
+ACUTE = {
+    "I want to kill myself": "self_harm",
+    "I've been feeling suicidal all week": "self_harm",
+    "I took an overdose of my sleeping pills": "self_harm",
+    "my brother just overdosed": "self_harm",
+    "I'm having chest pain and my left arm is numb": "medical",
+    "I think I'm having a stroke": "medical",
+    "I think I’m having a heart attack": "medical",
+    "My mom is having a seizure": "medical",
+    "my husband can't breathe": "medical",
+    "he's unconscious on the floor": "medical",
+    "I'm having a panic attack": "panic",
+    "I keep having panic attacks tonight": "panic",
+}
+
+
+def test_keyword_mentions_are_not_crises():
+    for message in NOT_CRISIS:
+        assert crisis_category(message) is None, message
+        assert classify_priority(message) == "chat", message
+
+
+def test_acute_messages_are_triaged():
+    for message, category in ACUTE.items():
+        assert crisis_category(message) == category, message
+        assert classify_priority(message) == "crisis", message
+
+
+if __name__ == "__main__":
+    test_keyword_mentions_are_not_crises()
+    test_acute_messages_are_triaged()
+    print(f"✅ {len(NOT_CRISIS)} non-crisis and {len(ACUTE)} acute messages triaged as expected")
@@ -0,0 +1,135 @@
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from utils.llm_scheduler import LLMScheduler, llm_scheduler
+
+# Upstream statuses that mean "slow down"
+THROTTLE_STATUSES = {429, 503}
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on in-flight LLM calls
+
+    Throttling (429/503, timeouts) or a latency spike halves the scheduler's
+    concurrency limit; every `limit` consecutive healthy responses add one
+    slot back, up to max_limit. Latency is averaged per series - one model
+    and one measure (a stream's first chunk, a generate call's whole
+    answer) - so a spike is only ever judged against like samples.
+    """
+
+    def __init__(self, scheduler: LLMScheduler, min_limit: Optional[int] = None, max_limit: Optional[int] = None,
+                 decrease_factor: Optional[float] = None, spike_factor: Optional[float] = None,
+                 latency_floor_ms: Optional[float] = None, cooldown_seconds: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.scheduler = scheduler
+        self.enabled = enabled if enabled is not None else os.getenv("LLM_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+        self.min_limit = min_limit or int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+        # Recover up to the configured LLM_MAX_CONCURRENCY cap unless a higher ceiling is set
+        self.max_limit = max_limit or int(os.getenv("LLM_MAX_CONCURRENCY_CEILING", str(scheduler.max_concurrency)))
+        self.decrease_factor = decrease_factor or float(os.getenv("LLM_AIMD_DECREASE_FACTOR", "0.5"))
+        # A response is a spike when slower than spike_factor x the running average (and above the floor)
+        self.spike_factor = spike_factor or float(os.getenv("LLM_LATENCY_SPIKE_FACTOR", "2.0"))
+        self.latency_floor_ms = latency_floor_ms or float(os.getenv("LLM_LATENCY_FLOOR_MS", "2000"))
+        # One burst of 429s from the same window should only cut the limit once
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("LLM_AIMD_COOLDOWN", "2"))
+
+        # series ("model/first_chunk", "model/total") -> running average
+        self.latency_ewma_ms: Dict[str, float] = {}
+        self._successes = 0
+        self._last_decrease = 0.0
+        self.history = deque(maxlen=100)
+        self.stats = {
+            "samples": 0,
+            "throttled": 0,
+            "latency_spikes": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+        self._record_change(scheduler.max_concurrency, "initial")
+
+    @property
+    def limit(self) -> int:
+        return self.scheduler.max_concurrency
+
+    def on_response(self, status_code: int, latency_ms: float, series: str = "default"):
+        """Feed one upstream outcome into the controller; latency is compared within its series only"""
+        self.stats["samples"] += 1
+        if status_code in THROTTLE_STATUSES:
+            self.stats["throttled"] += 1
+            self._decrease(f"status {status_code}")
+            return
+
+        if status_code >= 500:
+            self._successes = 0
+            return
+
+        ewma = self.latency_ewma_ms.get(series)
+        is_spike = (
+            ewma is not None
+            and latency_ms > self.latency_floor_ms
+            and latency_ms > ewma * self.spike_factor
+        )
+        self.latency_ewma_ms[series] = latency_ms if ewma is None else 0.9 * ewma + 0.1 * latency_ms
+
+        if is_spike:
+            self.stats["latency_spikes"] += 1
+            self._decrease(f"latency {latency_ms:.0f}ms")
+        else:
+            self._increase()
+
+    def on_timeout(self):
+        self.stats["samples"] += 1
+        self.stats["throttled"] += 1
+        self._decrease("timeout")
+
+    def _increase(self):
+        if not self.enabled:
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self._successes = 0
+            self.stats["increases"] += 1
+            self._apply(self.limit + 1, "recovered")
+
+    def _decrease(self, reason: str):
+        if not self.enabled:
+            return
+        self._successes = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_seconds:
+            return
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit < self.limit:
+            self._last_decrease = now
+            self.stats["decreases"] += 1
+            self._apply(new_limit, reason)
+
+    def _apply(self, new_limit: int, reason: str):
+        print(f"{'🐢' if new_limit < self.limit else '🐇'} LLM concurrency {self.limit} -> {new_limit} ({reason})")
+        self.scheduler.set_limit(new_limit)
+        self._record_change(new_limit, reason)
+
+    def _record_change(self, new_limit: int, reason: str):
+        self.history.append({
+            "timestamp": datetime.now().isoformat(),
+            "limit": new_limit,
+            "reason": reason,
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_ewma_ms": {series: round(ewma, 1) for series, ewma in self.latency_ewma_ms.items()},
+            "history": list(self.history)[-20:],
+        }
+
+
+# Shared controller driving llm_scheduler's limit
+concurrency_controller = AIMDController(llm_scheduler)
@@ -0,0 +1,111 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream is unhealthy, probing it again after a cool-off
+
+    closed -> open after failure_threshold consecutive failures; open ->
+    half_open once recovery_timeout has passed, letting one probe call
+    through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 recovery_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+        self.recovery_timeout = recovery_timeout or float(os.getenv("LLM_BREAKER_RECOVERY", "30"))
+
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.last_change: Optional[str] = None
+        self.stats = {
+            "allowed": 0,
+            "rejected": 0,
+            "successes": 0,
+            "failures": 0,
+            "opened": 0,
+            "probes": 0,
+        }
+
+    def allow_request(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+
+        if self.state == CLOSED:
+            self.stats["allowed"] += 1
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            self.stats["probes"] += 1
+            self.stats["allowed"] += 1
+            print(f"🩺 Circuit {self.name}: probing upstream")
+            return True
+
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self):
+        self.stats["successes"] += 1
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        self.stats["failures"] += 1
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["opened"] += 1
+            self._opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def release_probe(self):
+        """The probe ended without a verdict (e.g. cancelled) - let the next call probe"""
+        self._probe_in_flight = False
+
+    def _transition(self, state: str):
+        if state != self.state:
+            print(f"{'🔴' if state == OPEN else '🟡' if state == HALF_OPEN else '🟢'} Circuit {self.name}: {self.state} -> {state}")
+            self.state = state
+            self.last_change = datetime.now().isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "last_change": self.last_change,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+        }
+
+
+class BreakerRegistry:
+    """One circuit breaker per model/endpoint"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name)
+        return breaker
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+
+
+# Shared breakers for the Gemini endpoints
+circuit_breakers = BreakerRegistry()
@@ -0,0 +1,160 @@
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+
+class Conversation:
+    """Recent turns of one conversation, oldest first, plus a summary of older ones"""
+
+    __slots__ = ("turns", "bytes", "last_access", "summary", "summarized_tokens")
+
+    def __init__(self, max_turns: int):
+        self.turns: deque = deque(maxlen=max_turns)
+        self.bytes = 0
+        self.last_access = time.monotonic()
+        self.summary = ""
+        # Estimated prompt tokens of every turn folded into the summary so far
+        self.summarized_tokens = 0
+
+
+class ConversationStore:
+    """In-process chat history keyed by conversation_id
+
+    Each conversation keeps a ring buffer of its most recent turns, and
+    older turns can be folded into a running summary. Across
+    conversations the store is bounded by count and total bytes (least
+    recently used go first), and conversations idle longer than the TTL
+    are dropped.
+    """
+
+    def __init__(self, max_turns: Optional[int] = None, max_turn_chars: Optional[int] = None,
+                 max_conversations: Optional[int] = None, max_bytes: Optional[int] = None,
+                 idle_ttl_seconds: Optional[float] = None):
+        self.max_turns = max_turns or int(os.getenv("CONVERSATION_MAX_TURNS", "12"))
+        # Long answers are clipped before storing; the start carries most of the context
+        self.max_turn_chars = max_turn_chars or int(os.getenv("CONVERSATION_MAX_TURN_CHARS", "2000"))
+        self.max_conversations = max_conversations or int(os.getenv("CONVERSATION_MAX_CONVERSATIONS", "20000"))
+        self.max_bytes = max_bytes or int(os.getenv("CONVERSATION_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.idle_ttl_seconds = idle_ttl_seconds or float(os.getenv("CONVERSATION_IDLE_TTL", "1800"))
+
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            "turns_stored": 0,
+            "turns_dropped": 0,
+            "lru_evictions": 0,
+            "idle_evictions": 0,
+        }
+
+    def get_history(self, conversation_id: Optional[str]) -> List[Dict[str, str]]:
+        """Stored turns ({"role", "content"}), oldest first; empty for unknown conversations"""
+        if not conversation_id:
+            return []
+        self._expire_idle()
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return []
+        self._touch(conversation_id, conversation)
+        return list(conversation.turns)
+
+    def append(self, conversation_id: Optional[str], role: str, content: str):
+        if not conversation_id:
+            return
+        self._expire_idle()
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = Conversation(self.max_turns)
+        self._touch(conversation_id, conversation)
+
+        turn = {"role": role, "content": content[:self.max_turn_chars]}
+        if len(conversation.turns) == conversation.turns.maxlen:
+            # The ring buffer is about to push the oldest turn out
+            self._adjust(conversation, -self._turn_size(conversation.turns[0]))
+            self.stats["turns_dropped"] += 1
+        conversation.turns.append(turn)
+        self._adjust(conversation, self._turn_size(turn))
+        self.stats["turns_stored"] += 1
+
+        while len(self._conversations) > self.max_conversations or self._bytes > self.max_bytes:
+            oldest_id = next(iter(self._conversations))
+            if oldest_id == conversation_id and len(self._conversations) == 1:
+                break
+            self._remove(oldest_id)
+            self.stats["lru_evictions"] += 1
+
+    def get_summary(self, conversation_id: Optional[str]) -> Dict[str, Any]:
+        """{"summary", "summarized_tokens"} for a conversation (empty summary if none)"""
+        conversation = self._conversations.get(conversation_id) if conversation_id else None
+        if conversation is None:
+            return {"summary": "", "summarized_tokens": 0}
+        return {"summary": conversation.summary, "summarized_tokens": conversation.summarized_tokens}
+
+    def fold(self, conversation_id: str, turns: List[Dict[str, str]], summary: str, folded_tokens: int):
+        """Replace the given oldest turns with a new running summary
+
+        Turns appended while the summary was being written stay untouched;
+        turns the ring buffer already dropped are skipped.
+        """
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return
+        folded = {id(turn) for turn in turns}
+        while conversation.turns and id(conversation.turns[0]) in folded:
+            self._adjust(conversation, -self._turn_size(conversation.turns.popleft()))
+        summary_delta = len(summary.encode("utf-8")) - len(conversation.summary.encode("utf-8"))
+        conversation.summary = summary
+        conversation.summarized_tokens += folded_tokens
+        self._adjust(conversation, summary_delta)
+
+    def forget(self, conversation_id: str):
+        if conversation_id in self._conversations:
+            self._remove(conversation_id)
+
+    def _touch(self, conversation_id: str, conversation: Conversation):
+        conversation.last_access = time.monotonic()
+        self._conversations.move_to_end(conversation_id)
+
+    def _expire_idle(self):
+        # Access order means the idle conversations are all at the front
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        while self._conversations:
+            oldest_id, oldest = next(iter(self._conversations.items()))
+            if oldest.last_access > cutoff:
+                break
+            self._remove(oldest_id)
+            self.stats["idle_evictions"] += 1
+
+    @staticmethod
+    def _turn_size(turn: Dict[str, str]) -> int:
+        return len(turn["content"].encode("utf-8")) + len(turn["role"])
+
+    def _adjust(self, conversation: Conversation, delta: int):
+        conversation.bytes += delta
+        self._bytes += delta
+
+    def _remove(self, conversation_id: str):
+        conversation = self._conversations.pop(conversation_id)
+        self._bytes -= conversation.bytes
+
+    def clear(self):
+        self._conversations.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "conversations": len(self._conversations),
+            "bytes": self._bytes,
+            "config": {
+                "max_turns": self.max_turns,
+                "max_turn_chars": self.max_turn_chars,
+                "max_conversations": self.max_conversations,
+                "max_bytes": self.max_bytes,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+            },
+        }
+
+
+# Shared history for the chat endpoints
+conversation_store = ConversationStore()
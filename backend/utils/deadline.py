@@ -0,0 +1,138 @@
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Seconds each request may take, by path prefix (longest prefix wins, 0 = no deadline).
+# Streams get longer than one-shot calls; a batch as a whole has none - its
+# items are still bounded by the per-call budgets.
+DEFAULT_ROUTE_DEADLINES = {
+    "/api/chat": 25.0,
+    "/api/chat/stream": 60.0,
+    "/api/chat/batch": 0.0,
+    # Long documents are analyzed in several rounds of chunk calls
+    "/api/analyze": 120.0,
+    # Retell waits on the voice answer; better a rule-based reply than dead air
+    "/webhooks": 8.0,
+}
+
+# monotonic() time the current request must be answered by, None when unbounded
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def parse_route_deadlines(spec: str) -> Dict[str, float]:
+    """"/api/chat=20,/webhooks=5" -> {"/api/chat": 20.0, "/webhooks": 5.0}"""
+    deadlines = {}
+    for item in spec.split(","):
+        prefix, _, seconds = item.strip().partition("=")
+        if prefix and seconds:
+            deadlines[prefix.strip()] = float(seconds)
+    return deadlines
+
+
+class DeadlinePolicy:
+    """Per-route request deadlines and how often they cut a call short"""
+
+    def __init__(self, default_seconds: Optional[float] = None, routes: Optional[Dict[str, float]] = None):
+        self.default_seconds = default_seconds if default_seconds is not None else float(os.getenv("REQUEST_DEADLINE", "30"))
+        self.routes = {**DEFAULT_ROUTE_DEADLINES, **parse_route_deadlines(os.getenv("REQUEST_DEADLINES", ""))}
+        if routes:
+            self.routes.update(routes)
+        self.stats = {
+            "requests": 0,
+            "fallbacks": {},
+        }
+
+    def seconds_for(self, path: str) -> Optional[float]:
+        """Deadline for a request path, None for no deadline"""
+        matches = [prefix for prefix in self.routes if path == prefix or path.startswith(prefix.rstrip("/") + "/")]
+        seconds = self.routes[max(matches, key=len)] if matches else self.default_seconds
+        return seconds if seconds > 0 else None
+
+    def record_fallback(self, where: str):
+        """A call was skipped or cut short because the request ran out of time"""
+        self.stats["fallbacks"][where] = self.stats["fallbacks"].get(where, 0) + 1
+        print(f"⏰ Request deadline reached in {where} - serving fallback")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "fallbacks": dict(self.stats["fallbacks"]),
+            "default_seconds": self.default_seconds,
+            "routes": dict(self.routes),
+        }
+
+
+deadline_policy = DeadlinePolicy()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline (None when there is none)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def budget(limit: Optional[float] = None) -> Optional[float]:
+    """What one call may take: its own limit, cut to what is left of the request
+
+    0.0 means the request is already out of time; None means no limit at all.
+    """
+    left = remaining()
+    if left is None:
+        return limit
+    left = max(0.0, left)
+    return left if limit is None else min(limit, left)
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Bound the block to `seconds` (never extending an outer deadline); None = leave as is"""
+    if seconds is None:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(new_deadline if outer is None else min(outer, new_deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline():
+    """Detach background work from the request that started it"""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """Starts each HTTP request's deadline at the edge, from the route table
+
+    Plain ASGI rather than BaseHTTPMiddleware so the deadline is visible to
+    the endpoint and to a streaming response body alike. WebSocket sessions
+    are long-lived; their turns set their own deadline.
+    """
+
+    def __init__(self, app, policy: DeadlinePolicy = deadline_policy):
+        self.app = app
+        self.policy = policy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.policy.stats["requests"] += 1
+        with deadline_scope(self.policy.seconds_for(scope["path"])):
+            await self.app(scope, receive, send)
@@ -0,0 +1,102 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from utils.llm_scheduler import percentile
+
+
+class HedgePolicy:
+    """Latency budget for upstream calls, with optional hedged (duplicate) requests
+
+    With hedging enabled, a second identical call is sent when the first has
+    not answered by the configured percentile of recent latencies; the first
+    good answer wins and the other call is cancelled. Either way the whole
+    exchange is bounded by budget_seconds.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, hedge_percentile: Optional[float] = None,
+                 min_samples: Optional[int] = None, budget_seconds: Optional[float] = None,
+                 window: int = 200):
+        self.enabled = enabled if enabled is not None else os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_percentile = hedge_percentile or float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.min_samples = min_samples or int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.budget_seconds = budget_seconds or float(os.getenv("LLM_LATENCY_BUDGET", "30"))
+
+        self._latencies_ms = deque(maxlen=window)
+        self.stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "budget_exceeded": 0,
+        }
+
+    def record_latency(self, latency_ms: float):
+        self._latencies_ms.append(latency_ms)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or there is too little data"""
+        if not self.enabled or len(self._latencies_ms) < self.min_samples:
+            return None
+        return max(0.05, percentile(self._latencies_ms, self.hedge_percentile) / 1000)
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]], is_good: Callable[[Any], bool],
+                  budget_seconds: Optional[float] = None):
+        """Run attempt() (twice if it is slow) within the latency budget
+
+        budget_seconds shortens the budget for this one call (e.g. to what
+        is left of the request). Raises asyncio.TimeoutError when the budget
+        runs out.
+        """
+        self.stats["calls"] += 1
+        budget = self.budget_seconds if budget_seconds is None else min(budget_seconds, self.budget_seconds)
+        deadline = time.monotonic() + budget
+        delay = self.hedge_delay()
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=min(delay, budget))
+                if not done:
+                    self.stats["hedged"] += 1
+                    print(f"🪞 Hedging slow Gemini call after {delay * 1000:.0f}ms")
+                    tasks.append(asyncio.ensure_future(attempt()))
+
+            pending = set(tasks)
+            last_task = None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last_task = task
+                    if task.exception() is None and is_good(task.result()):
+                        if len(tasks) > 1 and task is tasks[1]:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+
+            if pending or last_task is None:
+                self.stats["budget_exceeded"] += 1
+                raise asyncio.TimeoutError(f"LLM latency budget of {budget:.1f}s exceeded")
+            # Every attempt finished without a good answer - surface the last one
+            return last_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "budget_seconds": self.budget_seconds,
+            "latency_samples": len(self._latencies_ms),
+        }
+
+
+# Shared policy for Gemini generateContent calls
+hedge_policy = HedgePolicy()
@@ -0,0 +1,216 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+
+import httpx
+
+
+class PooledTransport:
+    """Long-lived async HTTP connection pool for upstream LLM calls"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        pool_timeout: Optional[float] = None,
+    ):
+        # GEMINI_BASE_URL points the client at a stand-in (see gemini_standin.py) for load tests
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+        self.max_connections = max_connections or int(os.getenv("GEMINI_POOL_SIZE", "50"))
+        self.max_keepalive = max_keepalive or int(os.getenv("GEMINI_POOL_KEEPALIVE", "20"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "60"))
+        self.connect_timeout = connect_timeout or float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = read_timeout or float(os.getenv("GEMINI_READ_TIMEOUT", "60"))
+        self.pool_timeout = pool_timeout or float(os.getenv("GEMINI_POOL_TIMEOUT", "10"))
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {
+            "requests": 0,
+            "in_flight": 0,
+            "streams": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "tls_handshakes": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "total_time_ms": 0.0,
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the shared client on first use (and again if the event loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    self.read_timeout,
+                    connect=self.connect_timeout,
+                    pool=self.pool_timeout,
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+            print(f"🔌 HTTP pool ready: {self.base_url} (max {self.max_connections} connections)")
+        return self._client
+
+    def _make_trace(self):
+        """Build a per-request httpcore trace hook that records connection reuse"""
+        state = {"opened": False}
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                state["opened"] = True
+            elif event_name == "connection.start_tls.complete":
+                self.stats["tls_handshakes"] += 1
+
+        return trace, state
+
+    def _record_connection(self, state: Dict[str, Any]):
+        if state["opened"]:
+            self.stats["new_connections"] += 1
+        else:
+            self.stats["reused_connections"] += 1
+
+    async def post(self, path: str, json: Dict[str, Any], params: Dict[str, Any] = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        """POST a JSON body over the pooled connection"""
+        client = self._get_client()
+        trace, state = self._make_trace()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        start_time = time.perf_counter()
+        try:
+            response = await client.post(
+                path, json=json, params=params, timeout=request_timeout, extensions={"trace": trace}
+            )
+            self._record_connection(state)
+            return response
+        except httpx.TimeoutException:
+            self.stats["timeouts"] += 1
+            raise
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["total_time_ms"] += (time.perf_counter() - start_time) * 1000
+
+    async def get(self, path: str, params: Dict[str, Any] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        """GET over the pooled connection (model checks, warm-up)"""
+        client = self._get_client()
+        trace, state = self._make_trace()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+
+        self.stats["requests"] += 1
+        try:
+            response = await client.get(path, params=params, timeout=request_timeout, extensions={"trace": trace})
+            self._record_connection(state)
+            return response
+        except httpx.TimeoutException:
+            self.stats["timeouts"] += 1
+            raise
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+
+    async def request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None,
+                      params: Dict[str, Any] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """Any other method over the pooled connection (cache refresh/delete)"""
+        client = self._get_client()
+        trace, state = self._make_trace()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+
+        self.stats["requests"] += 1
+        try:
+            response = await client.request(
+                method, path, json=json, params=params, timeout=request_timeout, extensions={"trace": trace}
+            )
+            self._record_connection(state)
+            return response
+        except httpx.TimeoutException:
+            self.stats["timeouts"] += 1
+            raise
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+
+    @asynccontextmanager
+    async def stream(self, path: str, json: Dict[str, Any], params: Dict[str, Any] = None,
+                     timeout: Optional[float] = None) -> AsyncIterator[httpx.Response]:
+        """POST a JSON body and yield the response without buffering the body"""
+        client = self._get_client()
+        trace, state = self._make_trace()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["streams"] += 1
+        start_time = time.perf_counter()
+        try:
+            async with client.stream(
+                "POST", path, json=json, params=params, timeout=request_timeout, extensions={"trace": trace}
+            ) as response:
+                self._record_connection(state)
+                yield response
+        except httpx.TimeoutException:
+            self.stats["timeouts"] += 1
+            raise
+        except httpx.HTTPError:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["total_time_ms"] += (time.perf_counter() - start_time) * 1000
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            print("🔌 HTTP pool closed")
+        self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool configuration and connection reuse counters"""
+        completed = self.stats["new_connections"] + self.stats["reused_connections"]
+        return {
+            **self.stats,
+            "total_time_ms": round(self.stats["total_time_ms"], 1),
+            "reuse_ratio": round(self.stats["reused_connections"] / completed, 3) if completed else 0.0,
+            "avg_time_ms": round(self.stats["total_time_ms"] / self.stats["requests"], 1) if self.stats["requests"] else 0.0,
+            "config": {
+                "base_url": self.base_url,
+                "max_connections": self.max_connections,
+                "max_keepalive": self.max_keepalive,
+                "keepalive_expiry": self.keepalive_expiry,
+                "connect_timeout": self.connect_timeout,
+                "read_timeout": self.read_timeout,
+                "pool_timeout": self.pool_timeout,
+            },
+        }
+
+
+# Shared pool for every Gemini REST call in the process
+gemini_transport = PooledTransport()
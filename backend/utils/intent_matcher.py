@@ -0,0 +1,220 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, FrozenSet, Optional
+
+# Crisis keywords by kind of crisis; each kind has its own safety message.
+# When a message is several kinds of crisis, the first one here wins.
+CRISIS_CATEGORIES: Dict[str, List[str]] = {
+    "self_harm": [
+        'suicide', 'suicidal', 'kill myself', 'killing myself', 'end my life',
+        'self harm', 'self-harm', 'overdose',
+    ],
+    "medical": [
+        'chest pain', "can't breathe", 'cant breathe', 'cannot breathe', 'heart attack', 'stroke',
+        'seizure', 'unconscious', 'bleeding heavily',
+    ],
+    "panic": ['panic attack'],
+}
+
+# Candidate crisis messages: a keyword is enough to look closer, not to triage
+CRISIS_KEYWORDS = [keyword for keywords in CRISIS_CATEGORIES.values() for keyword in keywords]
+
+# Someone in the room: the patient or a person they are with
+_SOMEONE = r"(?:i'?m|i am|he'?s|he is|she'?s|she is|they'?re|they are|(?:my|our) \w+(?:'s| is)|someone is)"
+
+# A crisis keyword only triages a message that also says it is happening now,
+# to the patient or someone with them ("I think I'm having a stroke", "I took
+# an overdose"). Questions about a condition ("what is a panic attack?",
+# "how to avoid an overdose of tylenol") and history ("my dad had a stroke in
+# 2015") go to the LLM like any other message.
+ACUTE_CRISIS_CUES: Dict[str, List[str]] = {
+    "self_harm": [
+        r"\b(?:kill(?:ing)? myself|end my life)\b",
+        r"\b(?:i'?m|i am|i feel|feeling|i'?ve been|i keep)\b[^.?!]{0,20}\bsuicidal\b",
+        r"\bi\b[^.?!]{0,30}\b(?:commit|committing|attempt|attempted|thinking about|thought about) suicide\b",
+        r"\b(?:i|he|she|they|(?:my|our) \w+)(?: just| have| has|'ve)? (?:took|taken|had) an? overdose\b",
+        r"\b(?:i|he|she|they|(?:my|our) \w+)(?: just| have| has|'ve)? overdosed\b",
+        r"\bi\b[^.?!]{0,30}\bself[- ]harm",
+    ],
+    "medical": [
+        r"\bi(?:'m| am|'ve| have| feel| got| keep)\b[^.?!]{0,40}\bchest pains?\b",
+        rf"\b{_SOMEONE}(?: \w+)? having (?:an? )?(?:chest pains?|heart attack|stroke|seizures?)\b",
+        r"\b(?:i|he|she|they|(?:my|our) \w+) (?:can'?t|cannot) breathe\b",
+        rf"\b(?:{_SOMEONE}|went|fell|lying)(?: \w+)? unconscious\b",
+        rf"\b(?:{_SOMEONE}|it'?s|keeps?) bleeding heavily\b",
+    ],
+    "panic": [
+        rf"\b{_SOMEONE}(?: \w+)? having (?:an? |another )?panic attacks?\b",
+        r"\bi(?:'ve been| keep)\b[^.?!]{0,20}\bhaving (?:an? |another )?panic attacks?\b",
+        r"\bpanic attacks? (?:right )?now\b",
+    ],
+}
+
+_ACUTE_CRISIS_PATTERNS = {
+    category: re.compile("|".join(f"(?:{cue})" for cue in cues)) for category, cues in ACUTE_CRISIS_CUES.items()
+}
+
+# Messages that refer to the patient's own records must never be answered
+# from a shared cache entry
+PERSONAL_MARKERS = [
+    'my result', 'my lab', 'my test', 'my report', 'my prescription',
+    'my medication', 'my appointment', 'my bill', 'my insurance',
+    'my doctor', 'my record', 'my chart', 'my dose', 'my refill',
+]
+
+# Every keyword rule in the chat, mock and Retell paths, by intent.
+# crisis.* = kinds of crisis, reply.* = quick replies, widget.* = chat
+# widgets, route.* = model routing, mock.* = canned chat answers, voice.* =
+# free-account Retell answers.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "crisis": CRISIS_KEYWORDS,
+    **{f"crisis.{category}": keywords for category, keywords in CRISIS_CATEGORIES.items()},
+    "personal": PERSONAL_MARKERS,
+
+    "reply.mental_health": ['panic', 'anxiety', 'attack', 'scared', 'afraid', 'stress'],
+    "reply.medical": ['sick', 'ill', 'unwell', 'pain', 'hurt', 'fever'],
+    "reply.appointment": ['appointment'],
+    "reply.medication": ['prescription', 'medication', 'pill'],
+    "reply.results": ['result', 'test', 'lab', 'blood'],
+    "reply.urgent": ['emergency', 'urgent', '911', 'immediate', 'severe', 'panic'],
+
+    "widget.mental_health": ['panic', 'anxiety', 'stress', 'mental'],
+    "widget.calendar": ['appointment', 'schedule'],
+    "widget.symptom_checker": ['symptom', 'check', 'assessment'],
+    "widget.medication_list": ['medication', 'prescription', 'pharmacy'],
+    "widget.lab_results": ['result', 'test', 'lab'],
+    "widget.billing": ['bill', 'payment', 'insurance'],
+    # Widgets the AI answer itself points to
+    "widget.suggests_calendar": ['calendar', 'schedule'],
+    "widget.suggests_symptom_checker": ['symptom', 'assessment'],
+
+    # Questions that deserve the heavy model route
+    "route.clinical": [
+        'diagnos', 'lab result', 'test result', 'blood test', 'blood work', 'bloodwork',
+        'dosage', 'side effect', 'interaction', 'contraindicat', 'biopsy', 'mri', 'ct scan',
+        'x-ray', 'xray', 'ultrasound', 'ecg', 'ekg', 'cholesterol', 'glucose', 'a1c',
+        'hemoglobin', 'platelet', 'creatinine', 'thyroid', 'blood pressure', 'mg/dl', 'mmol',
+    ],
+
+    "mock.unwell": ['sick', 'ill', 'unwell', 'fever'],
+    "mock.headache": ['headache', 'migraine'],
+    "mock.appointment": ['appointment', 'schedule', 'book'],
+
+    "voice.medication": ['medication', 'prescription', 'refill', 'pill', 'drug'],
+    "voice.appointment": ['appointment', 'schedule', 'book', 'meeting'],
+    "voice.symptoms": ['symptom', 'pain', 'hurt', 'fever', 'cough', 'headache'],
+    "voice.results": ['test', 'lab', 'result', 'blood', 'xray'],
+    "voice.billing": ['bill', 'payment', 'insurance', 'claim'],
+    "voice.greeting": ['hello', 'hi', 'hey', 'greetings'],
+    "voice.thanks": ['thank', 'thanks', 'appreciate'],
+}
+
+
+def _trie_pattern(keywords) -> str:
+    """Regex for a keyword trie - shared prefixes are tested once, longest match first"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Finds every intent whose keywords occur in a text, in one pass
+
+    A text is lowercased once however many call sites ask about it. Chat
+    sized texts are scanned in one pass by a single trie-shaped regular
+    expression over all keywords (an Aho-Corasick style automaton run by
+    the regex engine in C). On long transcripts short keywords hit every
+    few characters, so there each distinct keyword is checked once with
+    `in`, skipping keywords whose intents are already found. Matching is
+    plain substring matching - 'ill' matches 'pill' - exactly like the
+    `word in text` checks it replaces. Results for short texts are
+    memoized, so the call sites looking at one message share one scan.
+    """
+
+    def __init__(self, intents: Dict[str, List[str]], cache_size: int = 4096,
+                 max_cached_length: int = 4096, single_pass_length: int = 256):
+        keyword_intents: Dict[str, set] = {}
+        for intent, keywords in intents.items():
+            for keyword in keywords:
+                keyword_intents.setdefault(keyword.lower(), set()).add(intent)
+
+        # A hit reports the longest keyword starting at that position; every
+        # shorter keyword that is a prefix of it matched there as well
+        self._intents_for: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*(
+                keyword_intents[prefix] for prefix in keyword_intents if keyword.startswith(prefix)
+            ))
+            for keyword in keyword_intents
+        }
+        self._pattern = re.compile(_trie_pattern(keyword_intents))
+        self._keywords = [(keyword, frozenset(found)) for keyword, found in keyword_intents.items()]
+        self.intents = frozenset(intents)
+        self.max_cached_length = max_cached_length
+        self.single_pass_length = single_pass_length
+        self._cached_scan = lru_cache(maxsize=cache_size)(self.scan)
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Uncached scan of text"""
+        text = text.lower()
+        found = set()
+        if len(text) > self.single_pass_length:
+            for keyword, intents in self._keywords:
+                if not intents <= found and keyword in text:
+                    found |= intents
+            return frozenset(found)
+        search = self._pattern.search
+        intents_for = self._intents_for
+        match = search(text)
+        while match:
+            found.update(intents_for[match.group()])
+            # Resume one character on so overlapping keywords are found too
+            match = search(text, match.start() + 1)
+        return frozenset(found)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Intents present in text"""
+        if len(text) > self.max_cached_length:
+            return self.scan(text)
+        return self._cached_scan(text)
+
+    def get_stats(self) -> Dict[str, int]:
+        info = self._cached_scan.cache_info()
+        return {
+            "intents": len(self.intents),
+            "keywords": len(self._intents_for),
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cache_entries": info.currsize,
+        }
+
+
+# Built once at import; shared by chat, mock and Retell paths
+intent_matcher = IntentMatcher(INTENT_KEYWORDS)
+
+
+def match_intents(text: str) -> FrozenSet[str]:
+    return intent_matcher.match(text)
+
+
+def crisis_category(text: str) -> Optional[str]:
+    """The kind of crisis a message is having right now, None if it only mentions one"""
+    intents = match_intents(text)
+    if "crisis" not in intents:
+        return None
+    text = text.lower().replace("\u2019", "'")
+    for category in CRISIS_CATEGORIES:
+        if f"crisis.{category}" in intents and _ACUTE_CRISIS_PATTERNS[category].search(text):
+            return category
+    return None
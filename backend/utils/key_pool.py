@@ -0,0 +1,287 @@
+import os
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
+
+# Seconds a key rests after a 429 that did not say how long to wait
+DEFAULT_COOLDOWN_SECONDS = 30.0
+# Window the per-key RPM/TPM quotas are counted over
+QUOTA_WINDOW_SECONDS = 60.0
+
+
+def parse_api_keys(spec: Optional[str] = None, fallback: Optional[str] = None) -> List[Tuple[str, str]]:
+    """GEMINI_API_KEYS -> [(label, key)]
+
+    "clinic-a=AIza...,clinic-b=AIza..." or plain "AIza...,AIza..." (labelled
+    key-1, key-2...). Falls back to the single GEMINI_API_KEY.
+    """
+    spec = os.getenv("GEMINI_API_KEYS", "") if spec is None else spec
+    fallback = os.getenv("GEMINI_API_KEY") if fallback is None else fallback
+    keys = []
+    for index, item in enumerate(item.strip() for item in spec.split(",")):
+        if not item:
+            continue
+        label, sep, key = item.partition("=")
+        if not sep:
+            label, key = f"key-{index + 1}", item
+        keys.append((label.strip(), key.strip()))
+    if not keys and fallback:
+        keys.append(("default", fallback))
+    return keys
+
+
+def api_key_count() -> int:
+    return max(1, len(parse_api_keys()))
+
+
+def retry_delay_seconds(body: str) -> Optional[float]:
+    """Wait Gemini asks for in a 429 body (google.rpc.RetryInfo "retryDelay": "17s")"""
+    match = re.search(r'"retryDelay"\s*:\s*"([\d.]+)s"', body or "")
+    return float(match.group(1)) if match else None
+
+
+class ApiKey:
+    """One API key with its own sliding-window usage and cooldown"""
+
+    def __init__(self, label: str, value: str, rpm_limit: int, tpm_limit: int):
+        self.label = label
+        self.value = value
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        # [monotonic time, tokens] per request in the last minute; tokens start
+        # as an estimate and are corrected when the response reports usage
+        self.window: deque = deque()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    @property
+    def masked(self) -> str:
+        return f"{self.value[:4]}…{self.value[-4:]}" if len(self.value) > 12 else "…"
+
+    def _prune(self, now: float):
+        while self.window and now - self.window[0][0] >= QUOTA_WINDOW_SECONDS:
+            self.window.popleft()
+
+    def usage(self, now: float) -> Tuple[int, int]:
+        """(requests, tokens) in the current window"""
+        self._prune(now)
+        return len(self.window), sum(entry[1] for entry in self.window)
+
+    def load(self, now: float, tokens: int) -> Optional[float]:
+        """Share of quota in use after one more request of `tokens`, None if it would not fit"""
+        if self.cooldown_until > now:
+            return None
+        requests, used_tokens = self.usage(now)
+        if requests + 1 > self.rpm_limit:
+            return None
+        # A request bigger than the whole TPM quota still goes out on an idle key
+        if used_tokens and used_tokens + tokens > self.tpm_limit:
+            return None
+        return max((requests + 1) / self.rpm_limit, (used_tokens + tokens) / self.tpm_limit)
+
+    def available_in(self, now: float, tokens: int) -> float:
+        """Seconds until the key could take a request of `tokens`"""
+        wait = max(0.0, self.cooldown_until - now)
+        requests, used_tokens = self.usage(now)
+        if requests + 1 > self.rpm_limit:
+            wait = max(wait, self.window[requests - self.rpm_limit][0] + QUOTA_WINDOW_SECONDS - now)
+        if used_tokens and used_tokens + tokens > self.tpm_limit:
+            # Wait for enough old requests to leave the window
+            freed = used_tokens + tokens - self.tpm_limit
+            for started, spent in self.window:
+                freed -= spent
+                if freed <= 0:
+                    wait = max(wait, started + QUOTA_WINDOW_SECONDS - now)
+                    break
+        return wait
+
+    def get_stats(self, now: float) -> Dict[str, Any]:
+        requests, tokens = self.usage(now)
+        return {
+            **self.stats,
+            "key": self.masked,
+            "in_flight": self.in_flight,
+            "rpm": requests,
+            "tpm": tokens,
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "cooling_down_seconds": round(max(0.0, self.cooldown_until - now), 1),
+        }
+
+
+class KeyLease:
+    """A key checked out for one request; give it back with ApiKeyPool.release()"""
+
+    __slots__ = ("key", "entry", "released")
+
+    def __init__(self, key: ApiKey, entry: list):
+        self.key = key
+        self.entry = entry
+        self.released = False
+
+    @property
+    def value(self) -> str:
+        return self.key.value
+
+
+class ApiKeyPool:
+    """Spreads Gemini requests over several API keys, each with its own quota
+
+    Every key tracks its requests and tokens over the last minute against
+    GEMINI_KEY_RPM / GEMINI_KEY_TPM and rests after a 429 (for the
+    retryDelay Gemini asks for, else KEY_COOLDOWN seconds). Requests go to
+    the least-loaded key with room left ("least_loaded") or to the next one
+    in turn ("round_robin"); when every key is full, acquire() waits for
+    the first one to free up, up to KEY_POOL_MAX_WAIT seconds.
+
+    A pool of one key only keeps the accounting: with nowhere else to send
+    the request, resting the key would turn a burst of 429s into an outage
+    (the AIMD controller already backs off instead).
+    """
+
+    def __init__(self, keys: Optional[List[Tuple[str, str]]] = None, rpm_limit: Optional[int] = None,
+                 tpm_limit: Optional[int] = None, strategy: Optional[str] = None,
+                 cooldown_seconds: Optional[float] = None, max_wait_seconds: Optional[float] = None):
+        rpm_limit = rpm_limit or int(os.getenv("GEMINI_KEY_RPM", "1000"))
+        tpm_limit = tpm_limit or int(os.getenv("GEMINI_KEY_TPM", "1000000"))
+        self.strategy = (strategy or os.getenv("KEY_POOL_STRATEGY", "least_loaded")).lower()
+        if self.strategy not in ("least_loaded", "round_robin"):
+            raise ValueError(f"KEY_POOL_STRATEGY must be least_loaded or round_robin, not '{self.strategy}'")
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("KEY_COOLDOWN", str(DEFAULT_COOLDOWN_SECONDS)))
+        self.max_wait_seconds = max_wait_seconds or float(os.getenv("KEY_POOL_MAX_WAIT", "10"))
+        self.keys = [ApiKey(label, value, rpm_limit, tpm_limit) for label, value in (keys if keys is not None else parse_api_keys())]
+        self._next = 0
+        self._changed = asyncio.Event()
+        self.stats = {
+            "acquired": 0,
+            "waited": 0,
+            "exhausted": 0,
+        }
+        if len(self.keys) > 1:
+            print(f"🔑 Gemini key pool: {len(self.keys)} keys ({self.strategy})")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def primary(self) -> Optional[str]:
+        """A key for calls outside the quota accounting (model checks)"""
+        return self.keys[0].value if self.keys else None
+
+    def _pick(self, now: float, tokens: int, exclude) -> Optional[ApiKey]:
+        candidates = []
+        for offset in range(len(self.keys)):
+            index = (self._next + offset) % len(self.keys)
+            key = self.keys[index]
+            if key in exclude:
+                continue
+            load = key.load(now, tokens)
+            if load is not None:
+                candidates.append((load, key.in_flight, offset, index, key))
+        if not candidates:
+            return None
+        if self.strategy == "round_robin":
+            chosen = min(candidates, key=lambda c: c[2])
+        else:
+            chosen = min(candidates, key=lambda c: (c[0], c[1], c[2]))
+        self._next = (chosen[3] + 1) % len(self.keys)
+        return chosen[4]
+
+    def try_acquire(self, tokens: int = 0, exclude=()) -> Optional[KeyLease]:
+        """Check out a key with room for a request of about `tokens`, or None if all are full"""
+        now = time.monotonic()
+        key = self._pick(now, tokens, exclude)
+        if key is None:
+            return None
+        entry = [now, tokens]
+        key.window.append(entry)
+        key.in_flight += 1
+        key.stats["requests"] += 1
+        self.stats["acquired"] += 1
+        return KeyLease(key, entry)
+
+    async def acquire(self, tokens: int = 0, timeout: Optional[float] = None, exclude=()) -> Optional[KeyLease]:
+        """Like try_acquire, but wait up to `timeout` seconds (at most max_wait_seconds) for a key to free up"""
+        lease = self.try_acquire(tokens, exclude)
+        if lease is not None or not self.keys:
+            return lease
+        self.stats["waited"] += 1
+        timeout = self.max_wait_seconds if timeout is None else min(timeout, self.max_wait_seconds)
+        give_up = time.monotonic() + timeout
+        while lease is None:
+            now = time.monotonic()
+            candidates = [key for key in self.keys if key not in exclude]
+            if not candidates:
+                break
+            if give_up - now <= 0:
+                break
+            wait = min(key.available_in(now, tokens) for key in candidates)
+            if wait > give_up - now:
+                # No key frees up in time - fail now rather than at the deadline
+                break
+            self._changed.clear()
+            try:
+                # Woken early when a lease is released or a cooldown set
+                await asyncio.wait_for(self._changed.wait(), max(wait, 0.01))
+            except asyncio.TimeoutError:
+                pass
+            lease = self.try_acquire(tokens, exclude)
+        if lease is None:
+            self.stats["exhausted"] += 1
+        return lease
+
+    def release(self, lease: KeyLease, status_code: Optional[int] = None, prompt_tokens: Optional[int] = None,
+                output_tokens: Optional[int] = None, retry_after: Optional[float] = None):
+        """Return a key with the outcome of its request
+
+        status_code None means no HTTP answer (transport failure or
+        cancellation). Token counts, when known, replace the estimate in the
+        window. A 429 rests the key; its request never counted against the
+        token quota.
+        """
+        if lease.released:
+            return
+        lease.released = True
+        key = lease.key
+        key.in_flight -= 1
+        if prompt_tokens is not None or output_tokens is not None:
+            lease.entry[1] = (prompt_tokens or 0) + (output_tokens or 0)
+            key.stats["prompt_tokens"] += prompt_tokens or 0
+            key.stats["output_tokens"] += output_tokens or 0
+        if status_code == 429:
+            lease.entry[1] = 0
+            key.stats["throttled"] += 1
+            if len(self.keys) > 1:
+                self._cool_down(key, retry_after)
+        elif status_code is not None and status_code >= 500:
+            key.stats["errors"] += 1
+        self._changed.set()
+
+    def _cool_down(self, key: ApiKey, retry_after: Optional[float]):
+        cooldown = retry_after if retry_after is not None else self.cooldown_seconds
+        key.cooldown_until = max(key.cooldown_until, time.monotonic() + cooldown)
+        print(f"🔑 Key '{key.label}' throttled - resting it for {cooldown:.0f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "strategy": self.strategy,
+            "max_wait_seconds": self.max_wait_seconds,
+            "size": len(self.keys),
+            "available": sum(1 for key in self.keys if key.cooldown_until <= now),
+            "keys": {key.label: key.get_stats(now) for key in self.keys},
+        }
+
+
+# Shared pool for the REST backend (GEMINI_API_KEYS, else GEMINI_API_KEY)
+gemini_key_pool = ApiKeyPool()
@@ -0,0 +1,154 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from utils.intent_matcher import crisis_category
+from utils.key_pool import api_key_count
+
+# Lower number = served first
+PRIORITY_CLASSES = {
+    "crisis": 0,
+    "chat": 1,
+    "batch": 2,
+    # Work nobody has asked for yet (pre-generated quick reply answers)
+    "speculative": 3,
+}
+
+def classify_priority(message: str, default: str = "chat") -> str:
+    """Promote crisis messages to the crisis class, otherwise keep the caller's class"""
+    if crisis_category(message):
+        return "crisis"
+    return default
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a small sample"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class LLMScheduler:
+    """Bounded concurrency pool for upstream LLM calls, served in priority order"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, wait_window: int = 500):
+        # 8 in-flight calls per API key unless capped explicitly
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", str(8 * api_key_count())))
+        self._active = 0
+        self._queue = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self.stats = {
+            name: {
+                "submitted": 0,
+                "acquired": 0,
+                "completed": 0,
+                "cancelled": 0,
+                "timed_out": 0,
+                "wait_total_ms": 0.0,
+                "wait_max_ms": 0.0,
+                "recent_waits_ms": deque(maxlen=wait_window),
+            }
+            for name in PRIORITY_CLASSES
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "chat", timeout: Optional[float] = None):
+        """Hold one upstream slot for the duration of the block
+
+        With a timeout, waiting longer than that for the slot raises
+        asyncio.TimeoutError.
+        """
+        if priority not in PRIORITY_CLASSES:
+            priority = "chat"
+        stats = self.stats[priority]
+        stats["submitted"] += 1
+
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._acquire(PRIORITY_CLASSES[priority]), timeout)
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+        except asyncio.TimeoutError:
+            stats["timed_out"] += 1
+            raise
+
+        waited_ms = (time.perf_counter() - start_time) * 1000
+        stats["acquired"] += 1
+        stats["wait_total_ms"] += waited_ms
+        stats["wait_max_ms"] = max(stats["wait_max_ms"], waited_ms)
+        stats["recent_waits_ms"].append(waited_ms)
+        try:
+            yield waited_ms
+        finally:
+            stats["completed"] += 1
+            self._release()
+
+    async def _acquire(self, level: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (level, next(self._seq), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot was handed to us just as we were cancelled - pass it on
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def set_limit(self, max_concurrency: int):
+        """Change the concurrency cap; in-flight calls above a lowered cap finish normally"""
+        self.max_concurrency = max(1, max_concurrency)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to the highest-priority live waiters"""
+        while self._active < self.max_concurrency and self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_CLASSES}
+        names = {level: name for name, level in PRIORITY_CLASSES.items()}
+        for level, _, future in self._queue:
+            if not future.done():
+                depth[names[level]] += 1
+        return depth
+
+    def get_stats(self) -> Dict[str, Any]:
+        classes = {}
+        for name, stats in self.stats.items():
+            classes[name] = {
+                "submitted": stats["submitted"],
+                "completed": stats["completed"],
+                "cancelled": stats["cancelled"],
+                "timed_out": stats["timed_out"],
+                "avg_wait_ms": round(stats["wait_total_ms"] / stats["acquired"], 1) if stats["acquired"] else 0.0,
+                "p95_wait_ms": round(percentile(stats["recent_waits_ms"], 95), 1),
+                "max_wait_ms": round(stats["wait_max_ms"], 1),
+            }
+        depth = self.queue_depth()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_class": depth,
+            "classes": classes,
+        }
+
+
+# Shared scheduler in front of every Gemini call
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,137 @@
+import os
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.intent_matcher import PERSONAL_MARKERS, match_intents
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share a key"""
+    text = message.lower().replace("’", "'").replace("'", "")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def is_patient_specific(message: str, context: Dict[str, Any] = None) -> bool:
+    """True when the answer depends on who is asking and must not be shared"""
+    # Follow-ups are answered in light of the earlier turns of that conversation
+    if (context or {}).get("history") or (context or {}).get("summary"):
+        return True
+    if not (context or {}).get("patient_id"):
+        return False
+    return "personal" in match_intents(message)
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry TTL for LLM responses"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, max_message_length: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+        # Long messages almost never repeat verbatim; skip them instead of filling the cache
+        self.max_message_length = max_message_length or int(os.getenv("RESPONSE_CACHE_MAX_MESSAGE_LENGTH", "200"))
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def make_key(self, message: str, system_instruction: Optional[str], model: str) -> str:
+        raw = "\x1f".join([normalize_message(message), system_instruction or "", model])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def should_bypass(self, message: str, context: Dict[str, Any] = None) -> bool:
+        """Patient-scoped bypass rules - personal or unusual requests always go upstream"""
+        context = context or {}
+        if not self.enabled or context.get("bypass_cache"):
+            return True
+        if len(message) > self.max_message_length:
+            return True
+        return is_patient_specific(message, context)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if entry["expires_at"] <= time.monotonic():
+            self._remove(key)
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry["value"]
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None, size: Optional[int] = None):
+        """Store a value; size defaults to its "content" text's bytes"""
+        size = (size if size is not None else len(value.get("content", "").encode("utf-8"))) + len(key)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = {
+            "value": value,
+            "size": size,
+            "expires_at": time.monotonic() + (ttl_seconds or self.ttl_seconds),
+        }
+        self._bytes += size
+        self.stats["stores"] += 1
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    def record_bypass(self):
+        self.stats["bypassed"] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "config": {
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "max_message_length": self.max_message_length,
+            },
+        }
+
+
+# Shared cache in front of GeminiClient.generate_response
+response_cache = ResponseCache()
+
+# Structured analyses by text hash - lab reports and documents are re-submitted
+# verbatim far more often than chat messages repeat, and change less
+analysis_cache = ResponseCache(
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "500")),
+    max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "86400")),
+    enabled=os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true",
+)
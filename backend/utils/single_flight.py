@@ -0,0 +1,57 @@
+import asyncio
+from typing import Dict, Any, Callable, Awaitable
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls so only one reaches the upstream"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]):
+        """Run factory() once per key; concurrent callers with the same key share the result
+
+        Returns (result, shared) where shared is True for callers that joined
+        an existing flight instead of starting one.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["leaders"] += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        # Shield so one caller disconnecting does not cancel the call for everyone else
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if not shared:
+                self.stats["errors"] += 1
+            raise
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["leaders"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._inflight),
+            "upstream_calls_saved": self.stats["coalesced"],
+            "saved_ratio": round(self.stats["coalesced"] / total, 3) if total else 0.0,
+        }
+
+
+# Shared coalescer for GeminiClient.generate_response
+gemini_single_flight = SingleFlight()
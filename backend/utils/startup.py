@@ -0,0 +1,65 @@
+import os
+import asyncio
+from typing import Dict, Any, Callable, Awaitable, Optional, List
+
+
+async def retry_warm_up(name: str, warm_up: Callable[[], Awaitable[None]],
+                        attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                        max_delay: float = 60.0) -> bool:
+    """Retry an async warm-up with exponential backoff (forever when attempts is 0)"""
+    attempts = attempts if attempts is not None else int(os.getenv("LLM_WARMUP_ATTEMPTS", "0"))
+    base_delay = base_delay or float(os.getenv("LLM_WARMUP_RETRY_DELAY", "2"))
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await warm_up()
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempts and attempt >= attempts:
+                print(f"❌ {name} warm-up gave up after {attempt} attempts: {str(e)[:100]}")
+                return False
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            print(f"⚠️  {name} warm-up failed ({str(e)[:80]}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+
+class StartupRegistry:
+    """Clients that finish initializing in the background after the app starts serving
+
+    Each registered client exposes `async warm_up()` and `get_status()`
+    (a dict with at least a boolean "ready").
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, client: Any):
+        self._clients[name] = client
+
+    def start(self):
+        """Kick off every warm-up without waiting for it"""
+        for name, client in self._clients.items():
+            self._tasks.append(asyncio.create_task(client.warm_up(), name=f"warm_up:{name}"))
+        print(f"🔥 Background warm-up started for: {', '.join(self._clients) or 'nothing'}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def get_readiness(self) -> Dict[str, Any]:
+        components = {name: client.get_status() for name, client in self._clients.items()}
+        return {
+            "ready": all(status["ready"] for status in components.values()),
+            "components": components,
+        }
+
+
+# Shared registry used by main.py's lifespan and /ready
+startup_registry = StartupRegistry()